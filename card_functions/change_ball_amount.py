@@ -8,7 +8,7 @@ def effect(difference, arbiters=None, card=None):
     for _ in range(difference):
         game.field.balls.append(Ball(game.config.objects_settings["ball"]["standard"],
                                      game.config.ball_start, game.textures.get(
-                game.config.objects_settings["ball"]["standard"]["texture"])))
+                game.config.objects_settings["ball"]["standard"].texture)))
         if game.round_instance is not None:
             game.round_instance.ball_queue.append(game.field.balls[-1])
     return True
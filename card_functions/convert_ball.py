@@ -7,7 +7,7 @@ def effect(ball_name, arbiters=None, card=None):
     if game.round_instance is not None and game.round_instance.running:
         for ball in game.round_instance.active_balls[:]:
             new_ball = Ball(game.config.objects_settings["ball"][ball_name], game.config.ball_start,
-                            game.textures.get(game.config.objects_settings["ball"][ball_name]["texture"]))
+                            game.textures.get(game.config.objects_settings["ball"][ball_name].texture))
             game.round_instance.active_balls.remove(ball)
             game.field.balls.remove(ball)
             ball.remove(game.field.space)
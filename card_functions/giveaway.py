@@ -1,4 +1,4 @@
-from random import randint
+import game_context
 
 
 def effect(amount, arbiters=None, card=None):
@@ -10,7 +10,7 @@ def effect(amount, arbiters=None, card=None):
     if len(appropriate) == 0:
         return False
     for _ in range(min(amount, len(appropriate))):
-        item = appropriate[randint(0, len(appropriate) - 1)]
+        item = appropriate[game_context.game.rng.shop.randint(0, len(appropriate) - 1)]
         item.properties["buy_price"] = 0
         item.properties["price"] = 0
         appropriate.remove(item)
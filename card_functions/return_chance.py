@@ -1,4 +1,3 @@
-from random import random
 import game_context
 from utils.text import loc
 
@@ -9,7 +8,7 @@ def effect(chance, arbiters=None, card=None):
         if arb.shape.type == 'ball':
             if arb in game.round_instance.ball_queue:
                 return True
-            if random() < chance:
+            if game.rng.physics.random() < chance:
                 game.round_instance.ball_queue.append(arb)
                 game.round_instance.ball_queue_coords.append(arb.body.position.y)
                 game.round_instance.immediate["splash"].append([arb.body.position.x, arb.body.position.y - 50,
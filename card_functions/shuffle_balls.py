@@ -1,4 +1,3 @@
-import random
 import game_context
 
 
@@ -12,7 +11,7 @@ def effect(arbiters=None, card=None):
         game.round_instance.active_balls.clear()
     if len(balls) == 0:
         return False
-    random.shuffle(balls)
+    game.rng.physics.shuffle(balls)
     if len(balls) * 35 > 600:
         spacing = 600 / len(balls)
     else:
@@ -1,4 +1,3 @@
-from random import random
 from game_objects import Ball
 import game_context
 
@@ -7,9 +6,9 @@ def effect(chance, arbiters=None, card=None):
     game = game_context.game
     if game.round_instance is not None and game.round_instance.running:
         for ball in game.round_instance.active_balls[:]:
-            if random() < chance:
+            if game.rng.physics.random() < chance:
                 new_ball = Ball(game.config.objects_settings["ball"]["golden_ball"], game.config.ball_start,
-                                game.textures.get(game.config.objects_settings["ball"]["golden_ball"]["texture"]))
+                                game.textures.get(game.config.objects_settings["ball"]["golden_ball"].texture))
                 game.round_instance.active_balls.remove(ball)
                 game.field.balls.remove(ball)
                 ball.remove(game.field.space)
@@ -1,11 +1,13 @@
 from pathlib import Path
 import os
-from json import load
-import pygame
+import definitions
 
 
 asset_path = Path(__file__).resolve().with_name("assets")
 fontfile = asset_path.joinpath('lang/TDATextCondensed.ttf')
+# Font files for languages the default font has no glyphs for, e.g. {"ja": asset_path.joinpath(...)}.
+# Empty: TDATextCondensed covers every character of en.json and ru.json, Cyrillic included.
+lang_fontfiles = {}
 
 
 class Config:
@@ -17,9 +19,11 @@ class Config:
 
         self.save_path = os.path.join(appdata_path, "save.pbl")
         self.pref_path = os.path.join(appdata_path, "pref.pbl")
+        self.replay_path = os.path.join(appdata_path, "last_round.pbr")
+        self.atlas_path = os.path.join(appdata_path, "textures.pta")
+        self.sound_cache_path = os.path.join(appdata_path, "sound_cache")
         self.debug_mode = False
         self.fullscreen = False
-        self.resolutions = pygame.display.list_modes()
         self.langs = ["en", "ru"]
         self.lang = self.langs[1]
         self.base_resolution = (1280, 720)
@@ -33,6 +37,8 @@ class Config:
         self.screen_height = 720
         self.fps = 180
         self.max_dt = 1 / self.fps
+        self.render_fps = 0  # 0 matches the display refresh rate
+        self.max_frame_time = 0.1  # physics time simulated per rendered frame at most, the rest is dropped
         self.gravity = (0, 900)
 
         # UI panel settings.
@@ -80,6 +86,7 @@ class Config:
         self.left_flipper_active_angle = -30
         self.right_flipper_default_angle = -30
         self.right_flipper_active_angle = 30
+        self.flipper_rotation_step = 1  # degrees between pre-rotated flipper sprites
 
         # Game play.
         self.balls = 3
@@ -109,11 +116,13 @@ class Config:
 
         self.shop_size = [2, 3, 1, 2]
 
-        with open(asset_path.joinpath('config/cards.json')) as file:
-            self.shop_items = load(file)
-        with open(asset_path.joinpath('config/objects.json')) as file:
-            self.objects_settings = load(file)
-        self.rarities = self.shop_items.pop("rarities")
+        self.shop_items, rarities, self.objects_settings = definitions.load_definitions(
+            asset_path.joinpath('config/cards.json'), asset_path.joinpath('config/objects.json'))
+        # Cards change rarity values during a run, so every run starts from its own copy.
+        self.rarities = {category: {rarity: dict(values) for rarity, values in table.items()}
+                         for category, table in rarities.items()}
+        from utils.text import compile_card_descriptions
+        compile_card_descriptions(self.shop_items)
 
         self.left_flipper_pos = (190, 630)
         self.right_flipper_pos = (410, 630)
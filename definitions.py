@@ -0,0 +1,150 @@
+"""
+definitions.py
+Card and board object definitions from cards.json and objects.json, parsed and validated once per
+process and shared read-only by every Config, round and simulation worker.
+
+Board objects become frozen ObjectDef records; their position on the board is passed to the game
+objects separately. Cards stay mappings (they are looked up by key all over the card code), but
+are frozen into read-only views with tuples instead of lists.
+"""
+from dataclasses import dataclass, field
+from json import load
+from types import MappingProxyType
+
+import effects
+
+
+@dataclass(frozen=True, slots=True)
+class EffectDef:
+    effect: str
+    trigger: str = "collision"
+    params: tuple = ()
+    cooldown: float = 0
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectDef:
+    """
+    One object class of objects.json.
+
+    Attributes:
+        kind (str): Object type, "ball", "bumper", "pin" or "flipper".
+        key (str): Class name of the object in objects.json, e.g. "bumper_big".
+        size (int | tuple): Radius, pin length, or (length, width) of a flipper.
+    """
+    kind: str
+    key: str
+    name: str
+    texture: str
+    size: int | tuple
+    force: float = 0.95
+    friction: float = 0.9
+    mass: float = None
+    max_speed: float = 1000
+    spacing: float = None
+    flags: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    effects: tuple = ()
+
+
+# Keys every object of a kind needs, on top of name, texture and size.
+object_required = {"ball": ("mass",), "bumper": ("force",), "pin": (), "flipper": ("force",)}
+object_keys = {"name", "texture", "size", "force", "friction", "mass", "max_speed", "spacing", "flags", "effects"}
+effect_keys = {"effect", "trigger", "params", "cooldown"}
+
+# Keys of the card categories of cards.json, required ones first.
+card_required = {
+    "card": ("name", "type", "price", "rarity"),
+    "immediate": ("name", "type", "price", "rarity"),
+    "buildable": ("name", "type", "price", "rarity", "object_type", "class"),
+    "pack": ("name", "type", "price", "rarity", "kind", "item_type", "amount"),
+}
+card_keys = {"name", "type", "price", "rarity", "sprite", "description", "effects", "flags", "functional",
+             "object_type", "class", "kind", "item_type", "amount"}
+card_effect_keys = {"effect", "params", "trigger", "usage", "negative", "duration"}
+
+_parsed = {}
+
+
+def freeze(value):
+    """Returns a read-only copy of parsed JSON: dicts become mapping proxies and lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def parse_object(kind, key, settings):
+    """Validates one objects.json entry and returns its ObjectDef."""
+    where = f"objects.json: {kind}.{key}"
+    if kind not in object_required:
+        raise ValueError(f"{where}: unknown object type")
+    unknown = set(settings) - object_keys
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+    for name in ("name", "texture", "size") + object_required[kind]:
+        if name not in settings:
+            raise ValueError(f"{where}: missing {name!r}")
+    size = settings["size"]
+    if kind == "flipper":
+        if not (isinstance(size, list) and len(size) == 2):
+            raise ValueError(f"{where}: flipper size must be [length, width]")
+        size = tuple(size)
+    elif not isinstance(size, int):
+        raise ValueError(f"{where}: size must be an integer")
+    effect_defs = []
+    for effect in settings.get("effects", []):
+        unknown = set(effect) - effect_keys
+        if unknown or "effect" not in effect:
+            raise ValueError(f"{where}: malformed effect {effect}")
+        effect_defs.append(EffectDef(effect["effect"], effect.get("trigger", "collision"),
+                                 freeze(effect.get("params", [])), effect.get("cooldown", 0)))
+    fields = {name: settings[name] for name in ("force", "friction", "mass", "max_speed", "spacing")
+              if name in settings}
+    return ObjectDef(kind, key, settings["name"], settings["texture"], size,
+                     flags=freeze(settings.get("flags", {})), effects=tuple(effect_defs), **fields)
+
+
+def parse_cards(shop_items, objects):
+    """Validates the card categories of cards.json and returns them frozen."""
+    for category, items in shop_items.items():
+        if category not in card_required:
+            raise ValueError(f"cards.json: unknown category {category!r}")
+        for item in items:
+            where = f"cards.json: {category} {item.get('name')}"
+            unknown = set(item) - card_keys
+            if unknown:
+                raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+            for name in card_required[category]:
+                if name not in item:
+                    raise ValueError(f"{where}: missing {name!r}")
+            for effect in item.get("effects", []):
+                if set(effect) - card_effect_keys:
+                    raise ValueError(f"{where}: malformed effect {effect}")
+            if category == "buildable" and item["class"] not in objects.get(item["object_type"], {}):
+                raise ValueError(f"{where}: no object {item['object_type']}.{item['class']}")
+    return freeze(shop_items)
+
+
+def load_definitions(cards_path, objects_path):
+    """
+    Parses and validates cards.json and objects.json, once per process.
+
+    Returns:
+        tuple: (shop_items, rarities, objects_settings). shop_items and rarities are read-only views,
+            objects_settings maps object type -> class -> ObjectDef.
+    """
+    key = (str(cards_path), str(objects_path))
+    if key not in _parsed:
+        with open(objects_path) as file:
+            raw_objects = load(file)
+        with open(cards_path) as file:
+            raw_cards = load(file)
+        objects = MappingProxyType({kind: MappingProxyType({name: parse_object(kind, name, settings)
+                                                            for name, settings in classes.items()})
+                                    for kind, classes in raw_objects.items()})
+        rarities = freeze(raw_cards.pop("rarities"))
+        shop_items = parse_cards(raw_cards, raw_objects)
+        effects.validate(shop_items, objects)
+        _parsed[key] = (shop_items, rarities, objects)
+    return _parsed[key]
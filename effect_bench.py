@@ -0,0 +1,86 @@
+"""
+effect_bench.py
+Microbenchmark of effect dispatch per collision: the old dict records called through a branching
+effects.call against the prebound effects.ObjectEffect and effects.CardEffect records.
+
+usage:
+    python effect_bench.py [-n 200000]
+"""
+import argparse
+import timeit
+
+from simulation import HeadlessGame
+import effects
+
+
+def dict_call(effect, arbiters=None, card=None):
+    """The dispatch effects.call did before effect records were bound."""
+    if effect["effect"] is None:
+        return True
+    e = effect["effect"]
+    p = effect["params"]
+    if arbiters is not None:
+        if card is not None:
+            return e(*p, arbiters=arbiters, card=card)
+        return e(*p, arbiters=arbiters)
+    if card is not None:
+        return e(*p, card=card)
+    return e(*p)
+
+
+def as_dict(effect):
+    record = {name: getattr(effect, name) for name in effect.__slots__ if name not in ("call", "recall", "card")}
+    record["params"] = list(record["params"])
+    return record
+
+
+def noop(*params, arbiters=None, card=None):
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare effect dispatch cost per collision.")
+    parser.add_argument("-n", "--number", type=int, default=200000, help="collisions per measurement")
+    args = parser.parse_args(argv)
+
+    game = HeadlessGame(0)
+    game.setup(cards=["card.devil.name", "card.boost.name"])
+    bumper = next(obj for obj in game.field.objects if obj.triggers.get("collision"))
+    ball = game.field.balls[0]
+    arbiters = [ball, bumper]
+    cards = [(card, effect) for card in game.inventory.items for effect in card.effects]
+
+    # The effect functions themselves are replaced, so only the dispatch is measured.
+    object_records = [effects.ObjectEffect(effect.name, effect.trigger, effect.params, effect.cooldown)
+                      for effect in bumper.triggers["collision"]]
+    card_records = [(card, effects.CardEffect({"effect": effect.name, "params": effect.params}, card))
+                    for card, effect in cards]
+    for record in object_records:
+        record.effect = noop
+        record.set_params(record.params)
+    for card, record in card_records:
+        record.effect = noop
+        record.set_params(record.params)
+    object_dicts = [as_dict(record) for record in object_records]
+    card_dicts = [(card, as_dict(record)) for card, record in card_records]
+
+    def old_dispatch():
+        for card, effect in card_dicts:
+            dict_call(effect, arbiters=arbiters, card=card)
+        for effect in object_dicts:
+            dict_call(effect, arbiters)
+
+    def new_dispatch():
+        for card, effect in card_records:
+            effect.call(arbiters=arbiters)
+        for effect in object_records:
+            effect.call(arbiters=arbiters)
+
+    print(f"{len(card_records)} card effects and {len(object_records)} object effects per collision")
+    for name, dispatch in (("dict + effects.call", old_dispatch), ("prebound records", new_dispatch)):
+        seconds = min(timeit.repeat(dispatch, number=args.number, repeat=5))
+        print(f"{name:>20}: {seconds / args.number * 1e9:.0f} ns per collision")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,168 @@
+from functools import partial
 from importlib import import_module
+import inspect
+import pkgutil
+import sys
+import warnings
 
+# Effect packages and the functions their modules may define.
+packages = {
+    "card_functions": ("effect", "negative_effect"),
+    "object_functions": ("effect",),
+    "functionals": ("evaluate",),
+}
+# Module list written by main.spec for the frozen build, where the packages can not be scanned.
+snapshot_module = "effects_snapshot"
+# Card effects handled by the game itself, without a module.
+builtin_card_effects = {"delete_object"}
+registry = {}
 
-def get_card_function(name, negative=False):
+
+def module_names(package):
+    """Lists the effect modules of a package, from the build snapshot if there is one in a frozen build."""
+    if getattr(sys, "frozen", False):
+        try:
+            return import_module(snapshot_module).modules[package]
+        except (ModuleNotFoundError, KeyError):
+            pass
+    return sorted(info.name for info in pkgutil.iter_modules(import_module(package).__path__) if not info.ispkg)
+
+
+def load_registry():
+    """Imports every effect module once and collects its functions into `registry`."""
+    if not registry:
+        for package, functions in packages.items():
+            registry[package] = {}
+            for name in module_names(package):
+                module = import_module(f"{package}.{name}")
+                registry[package][name] = {function: getattr(module, function, None) for function in functions}
+    return registry
+
+
+def write_snapshot(path):
+    """Writes the module lists of all effect packages as a python module for the frozen build."""
+    modules = {package: module_names(package) for package in packages}
+    with open(path, "w") as file:
+        file.write("# Generated by main.spec, do not edit.\n")
+        file.write(f"modules = {modules!r}\n")
+
+
+def _lookup(package, name, function):
     if name is None:
         return None
-    try:
-        card_module = import_module('card_functions.'+name)
-    except ModuleNotFoundError:
-        return None
-    if negative:
-        if getattr(card_module, 'negative_effect', None) is None:
-            return None
-        return card_module.negative_effect
-    if getattr(card_module, 'effect', None) is None:
+    module = load_registry()[package].get(name)
+    if module is None:
         return None
-    return card_module.effect
+    return module[function]
+
+
+def get_card_function(name, negative=False):
+    return _lookup("card_functions", name, "negative_effect" if negative else "effect")
 
 
 def get_object_function(name):
-    if name is None:
-        return None
-    try:
-        obj_module = import_module('object_functions.'+name)
-    except ModuleNotFoundError:
-        return None
-    return obj_module.effect
+    return _lookup("object_functions", name, "effect")
 
 
 def get_functional(name):
-    if name is None:
-        return None
-    try:
-        func_module = import_module('functionals.'+name)
-    except ModuleNotFoundError:
-        return None
-    return func_module.evaluate
-
-
-def call(effect, arbiters=None, card=None):
-    if effect["effect"] is None:
-        return True
-    e = effect["effect"]
-    p = effect["params"]
-    if arbiters is not None:
-        if card is not None:
-            return e(*p, arbiters=arbiters, card=card)
-        return e(*p, arbiters=arbiters)
-    if card is not None:
-        return e(*p, card=card)
-    return e(*p)
-
-
-def recall(effect, arbiters=None, card=None):
-    if effect["negative_effect"] is None:
-        return True
-    e = effect["negative_effect"]
-    p = effect["params"]
-    if arbiters is not None:
-        if card is not None:
-            return e(*p, arbiters=arbiters, card=card)
-        return e(*p, arbiters=arbiters)
-    if card is not None:
-        return e(*p, card=card)
-    return e(*p)
+    return _lookup("functionals", name, "evaluate")
+
+
+def validate(shop_items, objects_settings):
+    """Warns about effects and functionals in cards.json and the object definitions that have no module."""
+    functions = load_registry()
+    for items in shop_items.values():
+        for item in items:
+            for effect in item.get("effects", []):
+                name = effect.get("effect")
+                if name is not None and name not in functions["card_functions"] and name not in builtin_card_effects:
+                    warnings.warn(f"{item['name']}: unknown card effect {name!r}")
+            for functional in item.get("functional", []):
+                if functional["name"] not in functions["functionals"]:
+                    warnings.warn(f"{item['name']}: unknown functional {functional['name']!r}")
+    for object_type, classes in objects_settings.items():
+        for object_class, settings in classes.items():
+            for effect in settings.effects:
+                if effect.effect not in functions["object_functions"]:
+                    warnings.warn(f"{object_type} {object_class}: unknown object effect {effect.effect!r}")
+
+
+def _succeed(arbiters=None):
+    return True
+
+
+def bind(function, params, card=None):
+    """
+    Returns `function` with its params and card applied, to be called with the arbiters only.
+    The arbiters go in as a keyword: effect functions have defaulted params before `arbiters`.
+    """
+    if function is None:
+        return _succeed
+    bound = partial(function, *params) if card is None else partial(function, *params, card=card)
+    arbiters = inspect.signature(function).parameters.get("arbiters")
+    if arbiters is not None and arbiters.kind != arbiters.POSITIONAL_ONLY and arbiters.default is None:
+        # Passing arbiters=None is the same as leaving them out.
+        return bound
+
+    def call(arbiters=None):
+        if arbiters is None:
+            return bound()
+        return bound(arbiters=arbiters)
+    return call
+
+
+class CardEffect:
+    """
+    One effect of an inventory card. `call` and `recall` run the effect and its negative effect
+    with the card's params and the card already bound; they take the arbiters, if any, as a keyword.
+    """
+    __slots__ = ("name", "trigger", "usage", "is_negative", "duration", "params", "card",
+                 "effect", "negative_effect", "call", "recall")
+
+    def __init__(self, config, card=None):
+        self.name = config.get("effect", None)
+        self.trigger = config.get("trigger", "use")
+        self.usage = config.get("usage", "passive")
+        self.is_negative = config.get("negative", False)
+        self.duration = config.get("duration", 0)
+        self.card = card
+        self.effect = get_card_function(self.name)
+        self.negative_effect = get_card_function(self.name, negative=True)
+        self.set_params(config.get("params", ()))
+
+    def set_params(self, params):
+        """Replaces the params and rebinds the effect functions to them."""
+        self.params = tuple(params)
+        self.call = bind(self.effect, self.params, self.card)
+        self.recall = bind(self.negative_effect, self.params, self.card)
+
+    def for_card(self, card):
+        """Returns a copy of this effect bound to `card`, sharing its functions and params."""
+        effect = CardEffect.__new__(CardEffect)
+        effect.name = self.name
+        effect.trigger = self.trigger
+        effect.usage = self.usage
+        effect.is_negative = self.is_negative
+        effect.duration = self.duration
+        effect.card = card
+        effect.effect = self.effect
+        effect.negative_effect = self.negative_effect
+        effect.set_params(self.params)
+        return effect
+
+
+class ObjectEffect:
+    """One effect of a board object. `call` runs it with the params bound; it takes the arbiters as a keyword."""
+    __slots__ = ("name", "trigger", "cooldown", "params", "effect", "call")
+
+    def __init__(self, name, trigger="collision", params=(), cooldown=0):
+        self.name = name
+        self.trigger = trigger
+        self.cooldown = cooldown
+        self.effect = get_object_function(name)
+        self.set_params(params)
+
+    def set_params(self, params):
+        """Replaces the params and rebinds the effect function to them."""
+        self.params = tuple(params)
+        self.call = bind(self.effect, self.params)
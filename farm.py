@@ -0,0 +1,111 @@
+"""
+farm.py
+Balance farm: plays many seeded headless rounds of one scenario across all cores and streams the
+results as JSON lines while they finish.
+
+usage:
+    python farm.py -n 1000 --scenario scenario.json --output results.jsonl
+
+Each seed drives both the game's random streams and the bot (simulation.AutoController varies its
+launch charge, flipper reach and hold time per launch and flip), so different seeds play different
+trajectories even on a board without random card effects.
+
+A scenario file is a JSON object with optional keys "board_objects" (config.board_objects format),
+"balls" (ball classes from objects.json), "cards" (card names) and "round" (round index).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import mean, median
+
+
+def run_simulation(scenario, seed, max_time):
+    """Worker entry point: builds its own game, field and pymunk space and plays one round."""
+    from simulation import HeadlessGame
+
+    start = time.perf_counter()
+    game = HeadlessGame(seed)
+    game.setup(board_objects=scenario.get("board_objects"), balls=scenario.get("balls"),
+               cards=scenario.get("cards"), round_index=scenario.get("round", 0))
+    # The bot is seeded from the run, so the seed changes how the round is played.
+    exit_option, score = game.play_round(max_time=max_time)
+    hits = [{"name": obj.config.name, "type": obj.shape.type,
+             "pos": [round(obj.body.position.x), round(obj.body.position.y)], "hits": count}
+            for obj, count in game.round_instance.hit_counts.items()]
+    return {
+        "seed": seed,
+        "exit": exit_option,
+        "score": score,
+        "score_needed": game.score_needed,
+        "money": game.money,
+        "sim_time": game.round_instance.steps * game.config.max_dt,
+        "wall_time": time.perf_counter() - start,
+        "hits": hits
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded headless rounds in parallel.")
+    parser.add_argument("-n", "--rounds", type=int, default=100, help="number of simulated rounds")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first round, the rest count up")
+    parser.add_argument("--scenario", help="scenario JSON file")
+    parser.add_argument("--balls", help="comma separated ball classes, overrides the scenario")
+    parser.add_argument("--cards", help="comma separated card names, overrides the scenario")
+    parser.add_argument("--round", type=int, help="round index, overrides the scenario")
+    parser.add_argument("--max-time", type=float, default=600, help="simulated seconds before a round times out")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    scenario = {}
+    if args.scenario:
+        with open(args.scenario) as file:
+            scenario = json.load(file)
+    if args.balls:
+        scenario["balls"] = args.balls.split(",")
+    if args.cards:
+        scenario["cards"] = args.cards.split(",")
+    if args.round is not None:
+        scenario["round"] = args.round
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    results = []
+    errors = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(run_simulation, scenario, args.seed + i, args.max_time): args.seed + i
+                       for i in range(args.rounds)}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as error:
+                    # A failing round is reported and the rest of the farm keeps going.
+                    result = {"seed": futures[future], "exit": "error", "error": f"{type(error).__name__}: {error}"}
+                    errors.append(result)
+                else:
+                    results.append(result)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    scores = [r["score"] for r in results]
+    sim_time = sum(r["sim_time"] for r in results)
+    wall_time = time.perf_counter() - start
+    print(f"{len(results)} rounds in {wall_time:.1f} s ({sim_time / wall_time:.0f}x real time)", file=sys.stderr)
+    if errors:
+        print(f"failed: {len(errors)} rounds, e.g. seed {errors[0]['seed']}: {errors[0]['error']}", file=sys.stderr)
+    if not results:
+        return
+    print(f"score: mean {mean(scores):.0f}, median {median(scores):.0f}, max {max(scores)}", file=sys.stderr)
+    print(f"passed: {sum(r['score'] >= r['score_needed'] for r in results) / len(results):.1%}, "
+          f"timed out: {sum(r['exit'] == 'timeout' for r in results)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
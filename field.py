@@ -26,19 +26,18 @@ class Field:
         for obj in self.config.board_objects:
             if obj["type"] == "bumper":
                 bumper_def = self.config.objects_settings["bumper"][obj["class"]]
-                bumper_def["pos"] = obj["pos"]
-                bumper = game_objects.Bumper(self.space, bumper_def, sprite=game.textures.get(bumper_def["texture"]))
+                bumper = game_objects.Bumper(self.space, bumper_def, obj["pos"],
+                                             sprite=game.textures.get(bumper_def.texture))
                 self.objects.append(bumper)
             elif obj["type"] == "pin":
                 bumper_def = self.config.objects_settings["pin"][obj["class"]]
-                bumper_def["pos"] = obj["pos"]
-                bumper = game_objects.Pin(self.space, bumper_def, sprite=game.textures.get(bumper_def["texture"]))
+                bumper = game_objects.Pin(self.space, bumper_def, obj["pos"],
+                                          sprite=game.textures.get(bumper_def.texture))
                 self.objects.append(bumper)
             elif obj["type"] == "flipper":
                 flipper_def = self.config.objects_settings["flipper"][obj["class"]]
-                flipper_def["pos"] = obj["pos"]
-                flipper = game_objects.Flipper(self.space, flipper_def, obj["is_left"], self.config,
-                                               sprite=game.textures.get(flipper_def["texture"]))
+                flipper = game_objects.Flipper(self.space, flipper_def, obj["pos"], obj["is_left"], self.config,
+                                               sprite=game.textures.get(flipper_def.texture))
                 if obj["is_left"]:
                     self.left_flipper = flipper
                 else:
@@ -46,15 +45,30 @@ class Field:
                 self.objects.append(flipper)
 
         self.space.step(0.1)
+        self.timers = game_objects.ObjectTimers()
+        self.timers.rebuild(self.objects)
 
         # Create the balls.
         self.balls = [game_objects.Ball(self.config.objects_settings["ball"]["standard"], self.config.ball_start,
-                                        game.textures.get(self.config.objects_settings["ball"]["standard"]["texture"])
+                                        game.textures.get(self.config.objects_settings["ball"]["standard"].texture)
                                         ) for _ in range(self.config.balls)]
 
         self.hovered_item = None
         self._hovered_object = None
 
+        # Field texture and the board objects only change on placement, hits and cooldowns, so they are drawn
+        # into cached layers; see draw.
+        self.surface = None
+        self.field_texture = None
+        self.background = None
+        self.static_layer = None
+        self.static_keys = None
+        self.overlay_layer = None
+        self.overlay_key = None
+        self.layout_changed = True
+        self.full_redraw = True
+        self.dirty_rects = []
+
     @property
     def hovered_object(self):
         return self._hovered_object
@@ -67,23 +81,92 @@ class Field:
             self.space.remove(old_object.body, old_object.shape)
 
     def update(self, dt):
-        self.shield.sprite.update(dt)
+        if self.shield.sprite is not None:
+            self.shield.sprite.update(dt)
         self.space.step(dt)
 
-    def draw(self):
-        field_surface = pygame.Surface((self.config.screen_width, self.config.screen_height), pygame.SRCALPHA)
-        field_surface.fill((20, 20, 70))
+    def update_objects(self, dt):
+        """Per-step update of the board objects: all timers at once, then the few per-object leftovers."""
+        self.timers.update(dt)
+        for obj in self.objects:
+            if "sprite" in obj.flags and obj.sprite:
+                obj.sprite.set_frame(obj.flags["sprite"])
+        self.left_flipper.snap()
+        self.right_flipper.snap()
+
+    def _update_layers(self):
+        """
+        Redraws the cached static layers whose contents changed since the last frame and collects the changed
+        field areas in self.dirty_rects, or sets self.full_redraw if the layout changed.
+        """
+        self.full_redraw = self.layout_changed
+        self.layout_changed = False
+        self.dirty_rects = []
+        size = (self.config.screen_width, self.config.screen_height)
+        if self.background is None:
+            self.surface = pygame.Surface(size)
+            self.field_texture = pygame.Surface(self.config.field_size, pygame.SRCALPHA)
+            if self.textures.get("field"):
+                self.textures.get("field").draw(self.field_texture, (0, 0), self.config.field_size)
+            self.background = pygame.Surface(size)
+            self.background.fill((20, 20, 70))
+            self.background.blit(self.field_texture, (0, 0))
+            self.static_layer = pygame.Surface(size)
+            self.overlay_layer = pygame.Surface(self.config.field_size, pygame.SRCALPHA)
+
+        static_objects = [obj for obj in self.objects if obj not in [self.left_flipper, self.right_flipper]]
+        keys = {obj: obj.render_key() for obj in static_objects}
+        if self.full_redraw or self.static_keys is None or keys.keys() != self.static_keys.keys():
+            self.full_redraw = True
+            self.static_layer.blit(self.background, (0, 0))
+            for obj in static_objects:
+                obj.draw(self.static_layer)
+            self.static_keys = keys
+        elif keys != self.static_keys:
+            # Only the areas of the changed objects (cooldown, bump flash) are redrawn, together with the
+            # parts of other objects reaching into them.
+            changed = [obj.bounds() for obj in static_objects if self.static_keys[obj] != keys[obj]]
+            for rect in changed:
+                self.static_layer.set_clip(rect)
+                self.static_layer.blit(self.background, rect, rect)
+                for obj in static_objects:
+                    if obj.bounds().colliderect(rect):
+                        obj.draw(self.static_layer)
+            self.static_layer.set_clip(None)
+            self.dirty_rects += changed
+            self.static_keys = keys
+
+        overlay_key = (self.ramp_gate.sensor, self.shield.sensor,
+                       getattr(self.shield.sprite, "current_frame", None))
+        if overlay_key != self.overlay_key:
+            self.overlay_layer.fill((0, 0, 0, 0))
+            if not self.ramp_gate.sensor and self.ramp_gate.sprite is not None:
+                self.ramp_gate.sprite.draw(self.overlay_layer, (0, 0), self.config.field_size)
+            if not self.shield.sensor and self.shield.sprite is not None:
+                self.shield.sprite.draw(self.overlay_layer, (self.shield.a[0], self.shield.a[1] - 10),
+                                        (self.shield.b[0] - self.shield.a[0], 50))
+            self.dirty_rects.append(self.overlay_layer.get_rect())
+            self.overlay_key = overlay_key
+
+    def draw(self, alpha=1.0):
+        """
+        Draws the field and returns the field surface, which is reused between frames.
+        Static areas that changed since the previous frame are listed in self.dirty_rects.
+        """
+        self._update_layers()
+        field_surface = self.surface
         if game_context.game.debug_mode:
+            # The physics debug view goes under the field texture, so the static layer cannot be used.
+            field_surface.fill((20, 20, 70))
             self.space.debug_draw(pymunk.pygame_util.DrawOptions(field_surface))
-        if self.textures.get("field"):
-            self.textures.get("field").draw(field_surface, (0, 0), self.config.field_size)
+            field_surface.blit(self.field_texture, (0, 0))
+            for obj in self.static_keys:
+                obj.draw(field_surface)
+        else:
+            field_surface.blit(self.static_layer, (0, 0))
         draw_lf = True
         draw_rf = True
 
-        for obj in self.objects[:]:
-            if obj not in [self.left_flipper, self.right_flipper]:
-                obj.draw(field_surface)
-
         self.hovered_object = None
         if self.hovered_item:
             allowed = True
@@ -91,52 +174,59 @@ class Field:
             pos = self.hovered_item.pos - self.hovered_item.offset - self.position
             if props["object_type"] == "flipper":
                 config = self.config.objects_settings["flipper"][props["class"]]
-                config["pos"] = list(pos)
+                flipper_pos = pos
                 is_left = True
                 if self._try_placing(self.hovered_item):
                     if pos.distance_to(self.config.right_flipper_pos) < 80:
                         draw_rf = False
-                        config["pos"] = list(self.config.right_flipper_pos)
+                        flipper_pos = self.config.right_flipper_pos
                         is_left = False
                     elif pos.distance_to(self.config.left_flipper_pos) < 80:
                         draw_lf = False
-                        config["pos"] = list(self.config.left_flipper_pos)
+                        flipper_pos = self.config.left_flipper_pos
                 else:
                     allowed = False
-                config["pos"][0] -= config["size"][0] / 2
-                config["pos"][1] -= config["size"][1] / 2
-                self.hovered_object = game_objects.Flipper(self.space, config, is_left, self.config,
-                                                           sprite=self.textures.get(config.get("texture")),
+                flipper_pos = (flipper_pos[0] - config.size[0] / 2, flipper_pos[1] - config.size[1] / 2)
+                self.hovered_object = game_objects.Flipper(self.space, config, flipper_pos, is_left, self.config,
+                                                           sprite=self.textures.get(config.texture),
                                                            additional=True)
                 self.hovered_object.draw(field_surface, allowed)
             elif props["object_type"] == "bumper":
                 config = self.config.objects_settings["bumper"][props["class"]]
-                config["pos"] = list(pos)
-                self.hovered_object = game_objects.Bumper(self.space, config,
-                                                          sprite=self.textures.get(config.get("texture")))
+                self.hovered_object = game_objects.Bumper(self.space, config, tuple(pos),
+                                                          sprite=self.textures.get(config.texture))
                 if not self._try_placing(self.hovered_item):
                     allowed = False
                 self.hovered_object.draw(field_surface, allowed)
             elif props["object_type"] == "pin":
                 config = self.config.objects_settings["pin"][props["class"]]
-                config["pos"] = list(pos)
-                self.hovered_object = game_objects.Pin(self.space, config,
-                                                       sprite=self.textures.get(config.get("texture")))
+                self.hovered_object = game_objects.Pin(self.space, config, tuple(pos),
+                                                       sprite=self.textures.get(config.texture))
                 if not self._try_placing(self.hovered_item):
                     allowed = False
                 self.hovered_object.draw(field_surface, allowed)
 
         if draw_lf:
-            self.left_flipper.draw(field_surface)
+            self.left_flipper.draw(field_surface, alpha=alpha)
         if draw_rf:
-            self.right_flipper.draw(field_surface)
-        if not self.ramp_gate.sensor and self.ramp_gate.sprite is not None:
-            self.ramp_gate.sprite.draw(field_surface, (0, 0), self.config.field_size)
-        if not self.shield.sensor and self.shield.sprite is not None:
-            self.shield.sprite.draw(field_surface, (self.shield.a[0], self.shield.a[1] - 10),
-                                    (self.shield.b[0]-self.shield.a[0], 50))
+            self.right_flipper.draw(field_surface, alpha=alpha)
+        field_surface.blit(self.overlay_layer, (0, 0))
         return field_surface
 
+    def layout(self):
+        """Returns the current board in the config.board_objects format."""
+        layout = []
+        for obj in self.objects:
+            kind = obj.shape.type
+            entry = {"type": kind, "class": obj.config.key}
+            if kind == "flipper":
+                entry["pos"] = self.config.left_flipper_pos if obj.is_left else self.config.right_flipper_pos
+                entry["is_left"] = obj.is_left
+            else:
+                entry["pos"] = tuple(obj.pos)
+            layout.append(entry)
+        return layout
+
     def _try_placing(self, item):
         pos = item.pos - item.offset - self.position
         if item.properties["object_type"] == "flipper":
@@ -149,10 +239,10 @@ class Field:
                 self.config.top_wall_y < pos[1] < self.config.field_height):
             return False
         size = self.config.objects_settings[item.properties["object_type"]][item.properties["class"]]
-        if size.get("spacing") is None:
-            size = size.get("size", 0)
+        if size.spacing is None:
+            size = size.size
         else:
-            size = size.get("spacing")
+            size = size.spacing
         if len(self.space.point_query(tuple(pos), 10 + size, pymunk.ShapeFilter(1))) > 1:
             return False
         for obj in self.objects:
@@ -170,15 +260,15 @@ class Field:
         pos = item.pos - item.offset - self.position
         if props["object_type"] == "flipper":
             config = self.config.objects_settings["flipper"][props["class"]]
-            config["pos"] = list(pos)
+            flipper_pos = tuple(pos)
             is_left = True
             if pos.distance_to(self.config.right_flipper_pos) < 80:
-                config["pos"] = self.config.right_flipper_pos
+                flipper_pos = self.config.right_flipper_pos
                 is_left = False
             elif pos.distance_to(self.config.left_flipper_pos) < 80:
-                config["pos"] = self.config.left_flipper_pos
-            obj = game_objects.Flipper(self.space, config, is_left, self.config,
-                                       sprite=self.textures.get(config.get("texture")))
+                flipper_pos = self.config.left_flipper_pos
+            obj = game_objects.Flipper(self.space, config, flipper_pos, is_left, self.config,
+                                       sprite=self.textures.get(config.texture))
             if is_left:
                 self.objects.remove(self.left_flipper)
                 self.left_flipper.destroy()
@@ -189,15 +279,15 @@ class Field:
                 self.right_flipper = obj
         elif props["object_type"] == "bumper":
             config = self.config.objects_settings["bumper"][props["class"]]
-            config["pos"] = list(pos)
-            obj = game_objects.Bumper(self.space, config, sprite=self.textures.get(config["texture"]))
+            obj = game_objects.Bumper(self.space, config, tuple(pos), sprite=self.textures.get(config.texture))
         elif props["object_type"] == "pin":
             config = self.config.objects_settings["pin"][props["class"]]
-            config["pos"] = list(pos)
-            obj = game_objects.Pin(self.space, config, sprite=self.textures.get(config["texture"]))
+            obj = game_objects.Pin(self.space, config, tuple(pos), sprite=self.textures.get(config.texture))
         else:
             return False
         self.objects.append(obj)
+        self.timers.rebuild(self.objects)
+        self.layout_changed = True
         return True
 
     def delete(self, mouse_object):
@@ -205,6 +295,8 @@ class Field:
             if mouse_object in self.objects:
                 self.objects.remove(mouse_object)
                 self.space.remove(mouse_object.body, mouse_object.shape)
+                self.timers.rebuild(self.objects)
+                self.layout_changed = True
                 return True
             return False
         mouse_pos = mouse_object
@@ -214,5 +306,7 @@ class Field:
                 if obj.shape.type != 'flipper':
                     self.objects.remove(obj)
                     self.space.remove(obj.body, obj.shape)
+                    self.timers.rebuild(self.objects)
+                    self.layout_changed = True
                     return True
         return False
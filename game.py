@@ -4,17 +4,17 @@ import pygame
 
 from utils.misc import load_textures, choose_items
 from utils.textures import mouse_scale, display_screen
-from utils.text import format_text, loc
-from config import Config, asset_path, fontfile
+from utils.text import format_text, loc, get_font, preload_fonts
+from config import Config, asset_path
 from field import Field
 from ui import Ui
 from round import PinballRound
 from sound_engine import SoundEngine
+from game_random import RunRandom
 import screens
 from inventory import Inventory, PlayerInventory, InventoryItem
 from game_effects import DisappearingItem
 from game_objects import GameObject
-import effects
 import save_system
 
 
@@ -27,11 +27,15 @@ class PinballGame:
         save_system.load_pref(self)
         self.display = pygame.display.set_mode((self.config.screen_width, self.config.screen_height),
                                                (pygame.FULLSCREEN if self.config.fullscreen else 0))
+        # Only pygame-ce reports the refresh rate.
+        refresh_rates = getattr(pygame.display, "get_desktop_refresh_rates", lambda: [])()
+        self.render_fps = self.config.render_fps or max(refresh_rates, default=0) or 60
         self.screen = pygame.Surface(self.config.base_resolution, pygame.SRCALPHA)
+        preload_fonts(self.config.lang)
 
         with open(asset_path.joinpath('config/sprites.json')) as file:
             sprite_conf = json.load(file)
-        self.textures = load_textures(sprite_conf)
+        self.textures = load_textures(sprite_conf, self.config.atlas_path)
         pygame.display.set_caption("Infinite Pinball")
         icon = pygame.image.load(asset_path.joinpath('textures/ball.ico'))
         pygame.display.set_icon(icon)
@@ -48,26 +52,24 @@ class PinballGame:
         self.inventory = None
         self.field = None
         self.round_instance = None
-        self.sound = SoundEngine()
+        self.rng = RunRandom()
+        self.sound = SoundEngine(self.rng.cosmetic, self.config.sound_cache_path)
 
     def callback(self, event, arbiters=None):
-        for card in self.inventory.items:
-            for effect in card.effects:
-                if effect["trigger"] == event and effect["usage"] == "passive":
-                    effects.call(effect, arbiters=arbiters, card=card)
-        for card in self.round_instance.applied_cards.items[:]:
-            for effect in card.effects:
-                if effect["trigger"] == event and effect["usage"] == "active" and effect["duration"] != 0:
-                    effects.call(effect, arbiters=arbiters, card=card)
+        # Listener lists are rebuilt, not mutated, on inventory changes, so effects may add or remove cards here.
+        for card, effect in self.inventory.listeners.get(event, ()):
+            effect.call(arbiters=arbiters)
+        for card, effect in self.round_instance.applied_cards.listeners.get(event, ()):
+            if effect.duration != 0:
+                effect.call(arbiters=arbiters)
         if arbiters is None:
             return
         for arb in arbiters:
             if issubclass(arb.__class__, GameObject):
                 if arb.cooldown == 0:
-                    for effect in arb.effects:
-                        if effect["trigger"] == event:
-                            effects.call(effect, arbiters)
-                            arb.cooldown = max(arb.cooldown, effect["cooldown"])
+                    for effect in arb.triggers.get(event, ()):
+                        effect.call(arbiters=arbiters)
+                        arb.cooldown = max(arb.cooldown, effect.cooldown)
                 if arb.cooldown > 0:
                     arb.cooldown_timer = arb.cooldown
 
@@ -90,7 +92,7 @@ class PinballGame:
                 shop.add_item(InventoryItem(properties=item, sprite=self.textures.get("buildable_pack"),
                                             target_position=(self.config.shop_pos_objects[0] + (
                                                     2 * i - shop_size[0]) * 65, self.config.shop_pos_objects[1]),
-                              for_buildable=self.textures.get(obj_def["texture"])))
+                              for_buildable=self.textures.get(obj_def.texture)))
             items = choose_items(shop_size[2], self.config.shop_items["immediate"], self.config.rarities["immediate"])
             for i, item in enumerate(items):
                 shop.add_item(InventoryItem(properties=item, sprite=self.textures.get(item.get("sprite")),
@@ -136,7 +138,7 @@ class PinballGame:
                                                             target_position=(self.config.shop_pos_objects[0] +
                                                                              (2 * i - shop_size[0]) * 65,
                                                                              self.config.shop_pos_objects[1]),
-                                                            for_buildable=self.textures.get(obj_def["texture"])))
+                                                            for_buildable=self.textures.get(obj_def.texture)))
                             self.callback("reroll", arbiters=[shop])
                     else:
                         save_system.save()
@@ -222,9 +224,9 @@ class PinballGame:
                         allow = False
                         lasting = False
                         for effect in item.effects:
-                            if effect["usage"] == "active":
+                            if effect.usage == "active":
                                 allow = True
-                            if effect["duration"] != 0:
+                            if effect.duration != 0:
                                 lasting = True
                         if allow and not lasting and item.use():
                             self.inventory.remove_item(item)
@@ -232,12 +234,12 @@ class PinballGame:
 
             self.screen.fill((20, 20, 70))
 
-            big_font = pygame.font.Font(fontfile, 36)
+            big_font = get_font(36)
             header = big_font.render(loc("ui.text.shop"), True, (255, 255, 255))
             self.screen.blit(header, (self.config.shop_pos[0] + 50, self.config.shop_pos[1]))
 
             if message:
-                font = pygame.font.Font(fontfile, 24)
+                font = get_font(24)
                 msg_text = font.render(message, True, (0, 255, 0))
                 self.screen.blit(msg_text, (self.config.shop_pos_effects[0], self.config.shop_pos_effects[1] + 200))
 
@@ -299,7 +301,7 @@ class PinballGame:
                             self.inventory.remove_item(item)    # TODO: if placing is not allowed, remove object
                         elif item.properties["type"] == "card":
                             for effect in item.effects:
-                                if effect["name"] == "delete_object" and\
+                                if effect.name == "delete_object" and\
                                         self.field.delete(mouse_scale(pygame.mouse.get_pos())):
                                     item.use()              # TODO: if usage is not allowed, place object back
                                     self.inventory.remove_item(item)
@@ -364,11 +366,12 @@ class PinballGame:
                     self.flags = self.config.start_flags
                     self.money = 0
                     self.round = 0
+                    self.rng.reseed()
                 self.score_needed = self.config.min_score[self.round]
                 while True:
                     if continue_from is None or continue_from in ['round', 'round_finishable']:
                         continue_from = None
-                        self.round_instance = PinballRound()
+                        self.round_instance = PinballRound(record=True)
                         result, round_score = self.round_instance.run()
                         if result != "round_over":
                             self.cont = True
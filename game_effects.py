@@ -1,11 +1,15 @@
+from collections import OrderedDict
 import pygame
-from utils.text import multiline, loc, format_card_description
+from utils.text import multiline, loc, format_card_description, get_font
 import utils.textures
-from config import fontfile
 import game_context
 
 
 class ContextWindow:
+    # Composed description tooltips, see description_surface.
+    descriptions = OrderedDict()
+    max_descriptions = 64
+
     def __init__(self, pos=(0, 0), item=None, visible=False):
         self.x, self.y = pos
         self.item = item
@@ -21,9 +25,58 @@ class ContextWindow:
     def set_visibility(self, visibility):
         self.visible = visibility
 
+    @classmethod
+    def description_surface(cls, item, font):
+        """
+        Returns the composed description tooltip of an item. Tooltips are cached until the language,
+        the item's flags, its effect params or durations, or its price change.
+        """
+        key = (item, font, game_context.game.config.lang, repr(item.flags), item.properties["price"],
+               repr([(effect.params, effect.duration) for effect in item.effects]))
+        tooltip = cls.descriptions.get(key)
+        if tooltip is not None:
+            cls.descriptions.move_to_end(key)
+            return tooltip
+
+        header = multiline(loc(item.name), font, (50, 50, 50))
+        description = format_card_description(loc(item.properties["description"]), item.effects, item.flags)
+        description = multiline(description, font, (0, 0, 0))
+        price = font.render("$" + str(item.properties["price"]), 1, (255, 255, 0))
+        price_shadow = font.render("$" + str(item.properties["price"]), 1, (0, 0, 0))
+        width = max(header.get_width(), price.get_width(), description.get_width()) + 12
+        height = header.get_height() + price.get_height() + description.get_height() + 18
+        rarity = item.properties.get("rarity", None)
+        if rarity is not None:
+            rarity = game_context.game.config.rarities[item.properties["type"]][rarity]
+            rarity_shadow = font.render(loc(rarity["name"]), 1, (0, 0, 0))
+            rarity = font.render(loc(rarity["name"]), 1, utils.textures.color(rarity["color"]))
+            height += rarity.get_height() + 6
+        tooltip = pygame.Surface((width, height), pygame.SRCALPHA)
+        rect = tooltip.get_rect()
+        pygame.draw.rect(tooltip, (200, 200, 200), rect, border_radius=5)
+        pygame.draw.rect(tooltip, (255, 255, 255), rect, 2, border_radius=5)
+        pygame.draw.rect(tooltip, (110, 110, 110), description.get_rect(topleft=(
+            6, header.get_height() + 9)).inflate((6, 6)), border_radius=5)
+        tooltip.blit(header, ((width - header.get_width()) / 2, 3))
+        tooltip.blit(description, (6, 9 + header.get_height()))
+        for x, y in zip((0, -1, 0, 1), (-1, 0, 1, 0)):
+            tooltip.blit(price_shadow, ((width - price.get_width()) / 2 + x,
+                                        15 + header.get_height() + description.get_height() + y))
+        tooltip.blit(price, ((width - price.get_width()) / 2, 15 + header.get_height() + description.get_height()))
+        if rarity is not None:
+            for x, y in zip((0, -1, 0, 1), (-1, 0, 1, 0)):
+                tooltip.blit(rarity_shadow, ((width - rarity.get_width()) / 2 + x,
+                                             height - rarity.get_height() - 3 + y))
+            tooltip.blit(rarity, ((width - rarity.get_width()) / 2, height - rarity.get_height() - 3))
+
+        cls.descriptions[key] = tooltip
+        if len(cls.descriptions) > cls.max_descriptions:
+            cls.descriptions.popitem(last=False)
+        return tooltip
+
     def draw(self, surface):
         if self.visible:
-            font = pygame.font.Font(fontfile, 20)
+            font = get_font(20)
             match self.mode:
                 case 'text':
                     text_surface = multiline(loc(self.item), font, (0, 0, 0), (200, 200, 200))
@@ -38,42 +91,12 @@ class ContextWindow:
                     # Draw the item name centered at the top of the card.
                     surface.blit(text_surface, (rect.x + 3, rect.y + 3))
                 case 'description':
-                    header = multiline(loc(self.item.name), font, (50, 50, 50))
-                    description = format_card_description(loc(self.item.properties["description"]),
-                                                          self.item.effects, self.item.flags)
-                    description = multiline(description, font, (0, 0, 0))
-                    price = font.render("$" + str(self.item.properties["price"]), 1, (255, 255, 0))
-                    price_shadow = font.render("$" + str(self.item.properties["price"]), 1, (0, 0, 0))
-                    width = max(header.get_width(), price.get_width(), description.get_width()) + 12
-                    height = header.get_height() + price.get_height() + description.get_height() + 18
-                    rarity = self.item.properties.get("rarity", None)
-                    if rarity is not None:
-                        rarity = game_context.game.config.rarities[self.item.properties["type"]][rarity]
-                        rarity_shadow = font.render(loc(rarity["name"]), 1, (0, 0, 0))
-                        rarity = font.render(loc(rarity["name"]), 1, utils.textures.color(rarity["color"]))
-                        height += rarity.get_height() + 6
-                    if self.x + width > surface.get_width():
-                        self.x = surface.get_width() - width
-                    if self.y + height > surface.get_height():
-                        self.y = surface.get_height() - height
-                    rect = pygame.Rect(self.x, self.y, width, height)
-                    pygame.draw.rect(surface, (200, 200, 200), rect, border_radius=5)
-                    pygame.draw.rect(surface, (255, 255, 255), rect, 2, border_radius=5)
-                    pygame.draw.rect(surface, (110, 110, 110), description.get_rect(topleft=(
-                        self.x + 6, self.y + header.get_height() + 9)).inflate((6, 6)), border_radius=5)
-                    surface.blit(header, (self.x + (width - header.get_width()) / 2, self.y + 3))
-                    surface.blit(description, (self.x + 6, self.y + 9 + header.get_height()))
-                    for x, y in zip((0, -1, 0, 1), (-1, 0, 1, 0)):
-                        surface.blit(price_shadow, (self.x + (width - price.get_width()) / 2 + x,
-                                                    self.y + 15 + header.get_height() + description.get_height() + y))
-                    surface.blit(price, (self.x + (width - price.get_width()) / 2,
-                                         self.y + 15 + header.get_height() + description.get_height()))
-                    if rarity is not None:
-                        for x, y in zip((0, -1, 0, 1), (-1, 0, 1, 0)):
-                            surface.blit(rarity_shadow, (self.x + (width - rarity.get_width()) / 2 + x,
-                                                        self.y + height - rarity.get_height() - 3 + y))
-                        surface.blit(rarity, (self.x + (width - rarity.get_width()) / 2,
-                                              self.y + height - rarity.get_height() - 3))
+                    tooltip = self.description_surface(self.item, font)
+                    if self.x + tooltip.get_width() > surface.get_width():
+                        self.x = surface.get_width() - tooltip.get_width()
+                    if self.y + tooltip.get_height() > surface.get_height():
+                        self.y = surface.get_height() - tooltip.get_height()
+                    surface.blit(tooltip, (self.x, self.y))
                 case 'sell':
                     if self.item >= 0:
                         text_surface = multiline(loc("ui.text.sell+").format(self.item), font, (0, 0, 0),
@@ -93,6 +116,40 @@ class ContextWindow:
                     surface.blit(text_surface, (rect.x + 3, rect.y + 3))
 
 
+class GlyphAtlas:
+    """
+    Glyphs of the hit numbers (digits, signs, multiplier, money and exponent) rendered once per color and size.
+    Texts made of these glyphs are composed by blitting instead of rendering them with the font.
+    """
+    glyphs = "0123456789+-.X$e "
+    atlases = {}
+
+    def __init__(self, color, font):
+        self.font = font
+        self.images = {glyph: self.font.render(glyph, True, color) for glyph in self.glyphs}
+        self.height = self.font.get_height()
+
+    @classmethod
+    def get(cls, color, size=24):
+        font = get_font(size)
+        key = (tuple(color), font)
+        if key not in cls.atlases:
+            cls.atlases[key] = cls(color, font)
+        return cls.atlases[key]
+
+    def render(self, text, color):
+        """Returns the text as a new surface, falling back to the font for texts with other characters."""
+        if not all(char in self.images for char in text):
+            return self.font.render(text, True, color)
+        images = [self.images[char] for char in text]
+        image = pygame.Surface((sum(glyph.get_width() for glyph in images), self.height), pygame.SRCALPHA)
+        x = 0
+        for glyph in images:
+            image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return image
+
+
 class BaseEffect:
     def __init__(self, pos, lifetime=1.0, image=None):
         self.x, self.y = pos
@@ -107,10 +164,19 @@ class BaseEffect:
     def update(self, dt):
         self.age += dt
 
-    def draw(self, surface):
+    def render(self):
+        """Returns the (image, position) pair to blit for the current frame."""
         alpha = max(0, int(255 * (1 - self.age / self.lifetime)))
         self.image.set_alpha(alpha)
-        surface.blit(self.image, (self.rect.x, self.rect.y))
+        return self.image, (self.rect.x, self.rect.y)
+
+    def draw(self, surface):
+        surface.blit(*self.render())
+
+    @staticmethod
+    def draw_all(surface, effects):
+        """Draws several effects in one batched blit, in order."""
+        surface.blits([effect.render() for effect in effects], doreturn=False)
 
 
 class HitEffect(BaseEffect):
@@ -118,8 +184,7 @@ class HitEffect(BaseEffect):
         super().__init__(pos, lifetime)
         self.text = text
         self.color = color
-        self.font = pygame.font.Font(fontfile, 24)
-        self.image = self.font.render(self.text, True, self.color)
+        self.image = GlyphAtlas.get(color).render(self.text, self.color)
         self.rect = self.image.get_rect(center=(self.x, self.y))
 
     def update(self, dt):
@@ -127,19 +192,14 @@ class HitEffect(BaseEffect):
         self.y -= 30 * dt
         self.rect.center = (self.x, self.y)
 
-    def draw(self, surface):
-        alpha = max(0, int(255 * (1 - self.age / self.lifetime)))
-        image = self.font.render(self.text, True, self.color)
-        image.set_alpha(alpha)
-        surface.blit(image, (self.rect.x, self.rect.y))
-
 
 class DisappearingItem(BaseEffect):
     def __init__(self, original_item, lifetime=1.0):
         super().__init__(original_item.pos, lifetime)
         self.item = original_item
+        self.rect = original_item.rect
 
-    def draw(self, surface):
+    def render(self):
         alpha = max(0, int(255 * (1 - self.age / self.lifetime)))
         new_surface = pygame.Surface(self.item.card_size, pygame.SRCALPHA)
         new_surface.set_alpha(alpha)
@@ -160,10 +220,10 @@ class DisappearingItem(BaseEffect):
             pygame.draw.rect(new_surface, color, rect, border_radius=5)
             pygame.draw.rect(new_surface, (255, 255, 255), rect, 2, border_radius=5)
             # Draw the item name centered at the top of the card.
-            font = pygame.font.Font(fontfile, 20)
+            font = get_font(20)
             text_surface = font.render(loc(self.item.name), True, (0, 0, 0))
             new_surface.blit(text_surface, ((rect.width - text_surface.get_width()) / 2, 5))
-        surface.blit(new_surface, self.item.rect.topleft)
+        return new_surface, self.item.rect.topleft
 
 
 class AnimatedEffect:
@@ -1,37 +1,155 @@
 import math
+import numpy as np
 import pygame
 import pymunk
+from utils.textures import scaled
 import effects
 
 
+class BankedValue:
+    """Object attribute stored in the object's ObjectTimers slot, or on the object itself while it has none."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.scalar = "_" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj.timers is None:
+            return getattr(obj, self.scalar)
+        return obj.timers.arrays[self.name][obj.slot].item()
+
+    def __set__(self, obj, value):
+        if obj.timers is None:
+            setattr(obj, self.scalar, value)
+        else:
+            obj.timers.arrays[self.name][obj.slot] = value
+
+
+class ObjectTimers:
+    """
+    Struct-of-arrays storage for the activation and cooldown timers of all field objects,
+    updated in one vectorized pass per physics step instead of one GameObject.update call per object.
+    """
+    fields = {"activations": np.int64, "activations_dt_accum": np.float64, "cooldown": np.float64,
+              "cooldown_timer": np.float64, "bumped": np.float64}
+
+    def __init__(self):
+        self.objects = []
+        self.arrays = {name: np.zeros(0, dtype) for name, dtype in self.fields.items()}
+        self.sensor = np.zeros(0, bool)
+        self.switchable = np.zeros(0, bool)
+
+    def rebuild(self, objects):
+        """Moves the timers of `objects` into fresh arrays, keeping their current values."""
+        for obj in self.objects:
+            obj.bind(None)
+        self.objects = list(objects)
+        self.arrays = {name: np.array([getattr(obj, "_" + name, 0) for obj in self.objects], dtype)
+                       for name, dtype in self.fields.items()}
+        self.sensor = np.array([obj.shape.sensor for obj in self.objects], bool)
+        self.switchable = np.array([obj.shape.type not in ['flipper', 'ball'] for obj in self.objects], bool)
+        for slot, obj in enumerate(self.objects):
+            obj.bind(self, slot)
+
+    def update(self, dt):
+        a = self.arrays
+        a["activations_dt_accum"] += dt
+        a["activations"] = np.maximum(0, a["activations"] - np.floor(a["activations_dt_accum"]).astype(np.int64))
+        a["activations_dt_accum"] %= 1
+        a["cooldown_timer"] = np.maximum(0, a["cooldown_timer"] - dt)
+        a["cooldown"][a["cooldown_timer"] == 0] = 0
+        overheated = a["activations"] > 6
+        a["activations"][overheated] = 6
+        a["cooldown"][overheated] = 5
+        a["cooldown_timer"][overheated] = 5
+        a["bumped"] = np.maximum(0, a["bumped"] - dt)
+
+        sensor = self.switchable & (a["cooldown_timer"] > 0.3)
+        for slot in np.flatnonzero(sensor != self.sensor):
+            self.objects[slot].shape.sensor = bool(sensor[slot])
+        self.sensor = sensor
+
+
 class GameObject:
+    activations = BankedValue()
+    activations_dt_accum = BankedValue()
+    cooldown = BankedValue()
+    cooldown_timer = BankedValue()
+
     def __init__(self, config, pos, sprite=None, space=None):
         self.space = space
         self.config = config
         self.sprite = sprite
         if hasattr(self.sprite, "copy"):
             self.sprite = sprite.copy()
-        self.flags = config.get("flags", {}).copy()
-        self.effects = [{
-            "name": effect.get("effect", None),
-            "effect": effects.get_object_function(effect.get("effect", None)),
-            "trigger": effect.get("trigger", "collision"),
-            "params": effect.get("params", []).copy(),
-            "cooldown": effect.get("cooldown", 0)
-        } for effect in config.get("effects", [])]
-        self.radius = config["size"] if isinstance(config["size"], int) else max(config["size"])
-        self.spacing = config.get("spacing", self.radius)
+        self.flags = dict(config.flags)
+        self.effects = []
+        self.triggers = {}
+        for effect in config.effects:
+            self.add_effect(effects.ObjectEffect(effect.effect, effect.trigger, effect.params, effect.cooldown))
+        self.radius = config.size if isinstance(config.size, int) else max(config.size)
+        self.spacing = config.spacing if config.spacing is not None else self.radius
         self.body = pymunk.Body(body_type=pymunk.Body.STATIC)
         self.body.position = pos
+        self.prev_position = None
+        self.prev_angle = None
+        self.timers = None
+        self.slot = None
         self.cooldown = 0
         self.cooldown_timer = 0
         self.activations = 0
         self.activations_dt_accum = 0
 
+    def bind(self, timers, slot=None):
+        """Moves the timer values into `timers` at `slot`, or back onto the object if `timers` is None."""
+        names = [name for name in ObjectTimers.fields if isinstance(getattr(type(self), name, None), BankedValue)]
+        values = {name: getattr(self, name) for name in names}
+        self.timers = timers
+        self.slot = slot
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def add_effect(self, effect):
+        self.effects.append(effect)
+        self.triggers.setdefault(effect.trigger, []).append(effect)
+
     def move(self, pos):
         self.body.position = pos
+        self.prev_position = None
+
+    def save_state(self):
+        """Remember the body state before a physics step, for interpolated drawing."""
+        self.prev_position = self.body.position
+        self.prev_angle = self.body.angle
+
+    def render_state(self, alpha=1.0):
+        """Returns the (position, angle) to draw, interpolated between the last two physics steps."""
+        if self.prev_position is None or alpha >= 1:
+            return self.body.position, self.body.angle
+        return (self.prev_position.interpolate_to(self.body.position, alpha),
+                self.prev_angle + (self.body.angle - self.prev_angle) * alpha)
+
+    def cooldown_angle(self):
+        """Angle of the cooldown overlay in whole degrees, 0 when none is drawn."""
+        if self.cooldown > 0.5:
+            return int(360 * self.cooldown_timer / self.cooldown)
+        return 0
+
+    def render_key(self):
+        """Everything the static field layer picture of this object depends on."""
+        return self.flags.get("sprite"), self.cooldown_angle()
+
+    def bounds(self, alpha=1.0):
+        """Field area the object is drawn into."""
+        pos, _ = self.render_state(alpha)
+        rect = pygame.Rect(0, 0, self.radius * 2 + 4, self.radius * 2 + 4)
+        rect.center = (round(pos.x), round(pos.y))
+        return rect
 
     def update(self, dt):
+        """Timer update of objects outside of the field's ObjectTimers, e.g. balls."""
         self.activations_dt_accum += dt
         self.activations = max(0, self.activations - int(self.activations_dt_accum // 1))
         self.activations_dt_accum = self.activations_dt_accum % 1
@@ -48,35 +166,32 @@ class GameObject:
                 self.shape.sensor = True
             else:
                 self.shape.sensor = False
-        if "sprite" in self.flags:
+        if "sprite" in self.flags and self.sprite:
             self.sprite.set_frame(self.flags["sprite"])
 
 
 class Ball(GameObject):
     def __init__(self, config, pos, sprite=None):
         super().__init__(config, pos, sprite, space=None)
-        self.mass = config["mass"]
-        self.max_speed = config.get("max_speed", 1000)
+        self.mass = config.mass
+        self.max_speed = config.max_speed
         self.body = pymunk.Body(self.mass, pymunk.moment_for_circle(self.mass, 0, self.radius))
         self.body.position = pos
         self.shape = pymunk.Circle(self.body, self.radius)
         self.shape.parent = self
         self.shape.type = 'ball'
-        self.shape.elasticity = config.get("force", 0.95)
-        self.shape.friction = config.get("friction", 0.9)
+        self.shape.elasticity = config.force
+        self.shape.friction = config.friction
         self.shape.collision_type = 1  # for collisions
 
     def activate(self, space, position=None):
         old_pos = self.body.position
         self.body = pymunk.Body(self.mass, pymunk.moment_for_circle(self.mass, 0, self.radius))
-        if position is not None:
-            self.body.position = position
-        else:
-            self.body.position = old_pos
+        self.move(position if position is not None else old_pos)
         self.shape = pymunk.Circle(self.body, self.radius)
         self.shape.parent = self
         self.shape.type = 'ball'
-        self.shape.elasticity = self.config.get("force", 0.95)
+        self.shape.elasticity = self.config.force
         self.shape.friction = 0.9
         self.shape.collision_type = 1  # for collisions
         space.add(self.body, self.shape)
@@ -84,23 +199,24 @@ class Ball(GameObject):
     def remove(self, space):
         space.remove(self.body, self.shape)
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
+        pos, _ = self.render_state(alpha)
         if self.sprite:
-            self.sprite.draw(screen, (self.body.position.x - self.radius, self.body.position.y - self.radius),
-                             (self.radius * 2, self.radius * 2))
+            self.sprite.draw(screen, (pos.x - self.radius, pos.y - self.radius), (self.radius * 2, self.radius * 2))
         else:
-            pygame.draw.circle(screen, (200, 50, 50),
-                               (int(self.body.position.x), int(self.body.position.y)), self.radius)
+            pygame.draw.circle(screen, (200, 50, 50), (int(pos.x), int(pos.y)), self.radius)
 
 
 class Bumper(GameObject):
-    def __init__(self, space, config, sprite=None):
-        super().__init__(config, (0, 0), sprite, space)
-        self.pos = config["pos"]
+    bumped = BankedValue()
+
+    def __init__(self, space, config, pos, sprite=None):
+        super().__init__(config, pos, sprite, space)
+        self.pos = pos
         self.body = pymunk.Body(body_type=pymunk.Body.STATIC)
         self.body.position = self.pos
         self.shape = pymunk.Circle(self.body, self.radius)
-        self.shape.elasticity = config["force"]
+        self.shape.elasticity = config.force
         self.shape.friction = 0.5
         self.shape.collision_type = 2
         # Attach custom properties.
@@ -114,6 +230,9 @@ class Bumper(GameObject):
         if self.bumped > 0:
             self.bumped = max(0, self.bumped - dt)
 
+    def render_key(self):
+        return self.bumped > 0, self.cooldown_angle()
+
     def draw(self, screen, allowed=True):
         if self.sprite:
             if self.bumped:
@@ -131,31 +250,30 @@ class Bumper(GameObject):
             if not allowed:
                 pygame.draw.circle(screen, (255, 0, 0, 100),
                                    (int(self.body.position.x), int(self.body.position.y)), self.radius)
-        if self.cooldown > 0.5:
-            angle = int(360 * self.cooldown_timer / self.cooldown)
-            if angle > 0:
-                overlay = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-                center = (self.radius, self.radius)
-                points = [center]
-                for a in range(-90, -90 + angle + 1, 1):
-                    rad = math.radians(a)
-                    x = center[0] + self.radius * math.cos(rad)
-                    y = center[1] + self.radius * math.sin(rad)
-                    points.append((x, y))
+        angle = self.cooldown_angle()
+        if angle > 0:
+            overlay = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
+            center = (self.radius, self.radius)
+            points = [center]
+            for a in range(-90, -90 + angle + 1, 1):
+                rad = math.radians(a)
+                x = center[0] + self.radius * math.cos(rad)
+                y = center[1] + self.radius * math.sin(rad)
+                points.append((x, y))
 
-                pygame.draw.polygon(overlay, (0, 0, 0, 100), points)
-                screen.blit(overlay, (self.body.position.x - self.radius, self.body.position.y - self.radius))
+            pygame.draw.polygon(overlay, (0, 0, 0, 100), points)
+            screen.blit(overlay, (self.body.position.x - self.radius, self.body.position.y - self.radius))
 
 
 class Pin(GameObject):
-    def __init__(self, space, config, sprite=None):
-        super().__init__(config, (0, 0), sprite, space)
-        self.pos = config["pos"]
-        self.len = config["size"]
+    def __init__(self, space, config, pos, sprite=None):
+        super().__init__(config, pos, sprite, space)
+        self.pos = pos
+        self.len = config.size
         self.body = pymunk.Body(body_type=pymunk.Body.STATIC)
         self.body.position = self.pos
         self.shape = pymunk.Segment(self.body, (0, 0), (0, self.len), 5)
-        self.shape.elasticity = config.get("force", 0.95)
+        self.shape.elasticity = config.force
         self.shape.friction = 0.5
         self.shape.collision_type = 2
         # Attach custom properties.
@@ -170,34 +288,34 @@ class Pin(GameObject):
                                                            self.body.position.y - self.len // 2, 10, self.len))
             self.sprite.draw(screen, (self.body.position.x - 5, self.body.position.y - self.len // 2), (10, self.len),
                              alpha=100 + allowed*155)
-        if self.cooldown > 0.5:
-            angle = int(360 * self.cooldown_timer / self.cooldown)
-            if angle > 0:
-                overlay = pygame.Surface((10, self.len), pygame.SRCALPHA)
-                center = (5, self.len // 2)
-                points = [center]
-                for a in range(-90, -90 + angle + 1, 1):
-                    rad = math.radians(a)
-                    x = center[0] + self.radius * math.cos(rad)
-                    y = center[1] + self.radius * math.sin(rad)
-                    points.append((x, y))
+        angle = self.cooldown_angle()
+        if angle > 0:
+            overlay = pygame.Surface((10, self.len), pygame.SRCALPHA)
+            center = (5, self.len // 2)
+            points = [center]
+            for a in range(-90, -90 + angle + 1, 1):
+                rad = math.radians(a)
+                x = center[0] + self.radius * math.cos(rad)
+                y = center[1] + self.radius * math.sin(rad)
+                points.append((x, y))
 
-                pygame.draw.polygon(overlay, (0, 0, 0, 100), points)
-                screen.blit(overlay, (self.body.position.x - 5, self.body.position.y - self.len // 2))
+            pygame.draw.polygon(overlay, (0, 0, 0, 100), points)
+            screen.blit(overlay, (self.body.position.x - 5, self.body.position.y - self.len // 2))
 
 
 class Flipper(GameObject):
+    # (texture, size, step) -> {angle in degrees: rotated texture}, shared by all flippers
+    rotations = {}
 
-    def __init__(self, space, flipper_def, is_left, config, sprite=None, additional=False):
+    def __init__(self, space, flipper_def, pos, is_left, config, sprite=None, additional=False):
         super().__init__(flipper_def, (0, 0), sprite, space)
         self.is_left = is_left
         self.mass = 100
-        self.length, self.width = flipper_def["size"]
+        self.length, self.width = flipper_def.size
         vertices = [(-self.length/2, -self.width/2), (self.length/2, -self.width/2),
                     (self.length/2, self.width/2), (-self.length/2, self.width/2)]
         moment = pymunk.moment_for_poly(self.mass, vertices)
         self.body = pymunk.Body(self.mass, moment)
-        pos = flipper_def["pos"]
         if is_left:
             self.body.position = (pos[0] + self.length/2, pos[1] + self.width/2)
         else:
@@ -206,7 +324,7 @@ class Flipper(GameObject):
         self.shape.parent = self
         self.shape.collision_type = 2
         self.shape.type = 'flipper'
-        self.shape.elasticity = flipper_def["force"]
+        self.shape.elasticity = flipper_def.force
         self.shape.friction = 0.1
         space.add(self.body, self.shape)
 
@@ -239,10 +357,25 @@ class Flipper(GameObject):
             )
             space.add(self.spring)
             self.snap()
-        if self.is_left:
-            self.sprite.set_frame(0)
-        else:
-            self.sprite.set_frame(1)
+        self.rotated = None
+        if self.sprite:
+            self.sprite.set_frame(0 if self.is_left else 1)
+            angles = [config.left_flipper_default_angle, config.left_flipper_active_angle,
+                      config.right_flipper_default_angle, config.right_flipper_active_angle]
+            self.rotation_step = config.flipper_rotation_step
+            self.rotated = self.prerotate(min(angles), max(angles))
+
+    def prerotate(self, lowest, highest):
+        """Returns the shared rotated variants of the current sprite frame between the angles, in degrees."""
+        texture = self.sprite.sprites[self.sprite.current_frame].texture if hasattr(self.sprite, "sprites") \
+            else self.sprite.texture
+        key = (texture, (self.length, self.width), self.rotation_step)
+        if key not in Flipper.rotations:
+            texture = scaled(texture, (self.length, self.width))
+            steps = range(math.floor(lowest / self.rotation_step), math.ceil(highest / self.rotation_step) + 1)
+            Flipper.rotations[key] = {step * self.rotation_step:
+                                      pygame.transform.rotate(texture, step * self.rotation_step) for step in steps}
+        return Flipper.rotations[key]
 
     def update(self, dt):
         super().update(dt)
@@ -264,14 +397,29 @@ class Flipper(GameObject):
         """Determine active state based on the spring's rest_angle."""
         return self.spring.rest_angle == self.active_angle
 
-    def draw(self, screen, allowed=True):
-        points = [(self.body.position.x + self.length / 2 + p.x,
-                   self.body.position.y + self.width / 2 + p.y) for p in self.shape.get_vertices()]
+    def bounds(self, alpha=1.0):
+        pos, _ = self.render_state(alpha)
+        size = math.ceil(math.hypot(self.length, self.width)) * 2 + 4
+        rect = pygame.Rect(0, 0, size, size)
+        rect.center = (round(pos.x), round(pos.y))
+        return rect
+
+    def draw(self, screen, allowed=True, alpha=1.0):
+        pos, angle = self.render_state(alpha)
+        points = [(pos.x + self.length / 2 + p.x,
+                   pos.y + self.width / 2 + p.y) for p in self.shape.get_vertices()]
         if self.sprite:
             if not allowed:
                 pygame.draw.polygon(screen, (255, 0, 0, 100), points)
-            self.sprite.draw(screen, (round(self.body.position.x*2)/2, round(self.body.position.y*2)/2),
-                             (self.length, self.width), -math.degrees(self.body.angle), alpha=100 + allowed*155)
+            position = (round(pos.x*2)/2, round(pos.y*2)/2)
+            degrees = -math.degrees(angle)
+            rotated = self.rotated.get(round(degrees / self.rotation_step) * self.rotation_step) \
+                if degrees != 0 else None
+            if rotated is not None:
+                rotated.set_alpha(100 + allowed*155)
+                screen.blit(rotated, rotated.get_rect(center=position))
+            else:
+                self.sprite.draw(screen, position, (self.length, self.width), degrees, alpha=100 + allowed*155)
         else:
             pygame.draw.polygon(screen, (200, 200, 50), points)
             if not allowed:
@@ -0,0 +1,40 @@
+import random
+
+
+class RunRandom:
+    """
+    Random number streams of one run, all derived from a single seed.
+    Streams are independent, so e.g. extra sound variations never change what the shop offers.
+
+    Attributes:
+        shop (random.Random): Shop contents, packs and shop-side card effects.
+        physics (random.Random): Ball queue order and gameplay effects during a round.
+        cosmetic (random.Random): Sound variations and other things that do not affect the game.
+    """
+    streams = ("shop", "physics", "cosmetic")
+
+    def __init__(self, seed=None):
+        self.seed = None
+        self.shop = random.Random()
+        self.physics = random.Random()
+        self.cosmetic = random.Random()
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Restarts all streams from `seed`, or from a fresh random seed if it is None."""
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        for name in self.streams:
+            getattr(self, name).seed(f"{seed}:{name}")
+
+    def begin_round(self, round_index):
+        """Restarts the physics stream for a round, so each round can be reproduced on its own."""
+        self.physics.seed(f"{self.seed}:physics:{round_index}")
+
+    def getstate(self):
+        return {name: getattr(self, name).getstate() for name in self.streams}
+
+    def setstate(self, state):
+        for name, stream_state in state.items():
+            getattr(self, name).setstate(stream_state)
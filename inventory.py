@@ -1,74 +1,104 @@
 import math
+from collections import ChainMap
 import pygame
 from game_effects import ContextWindow
-from utils.text import multiline, loc, multiline_in_rect
+from utils.text import multiline, loc, multiline_in_rect, get_font
 from utils.textures import mouse_scale
 import effects
-from config import fontfile
 import game_context
 
 
+class CardPrototype:
+    """
+    The immutable part of a card definition, shared by all InventoryItems of that card: its properties,
+    default flags and effects with their functions resolved. Items keep their own changes in ChainMaps
+    over the prototype's properties and flags.
+    """
+    prototypes = {}
+
+    def __init__(self, properties):
+        self.source = properties
+        self.name = properties["name"]
+        self.rarity = properties.get("rarity", None)
+        self.properties = dict(properties, buy_price=properties.get("price", 0))
+        self.flags = properties.get("flags", {})
+        self.effects = tuple(effects.CardEffect(effect) for effect in properties.get("effects", []))
+
+    @classmethod
+    def get(cls, properties):
+        """Returns the prototype of a card definition, building it the first time the definition is seen."""
+        prototype = cls.prototypes.get(properties["name"])
+        if prototype is None or properties is not prototype.source and properties is not prototype.properties:
+            prototype = cls.prototypes[properties["name"]] = cls(properties)
+        return prototype
+
+
 class InventoryItem:
     def __init__(self, properties=None, sprite=None, target_position=(0, 0), card_size=(120, 160),
                  init_pos=None, for_buildable=None):
         if properties is None:
             properties = {}
+        overrides = {}
+        if isinstance(properties, ChainMap):
+            # Properties of another item: keep its changes, the price it is bought for is the current one.
+            overrides = dict(properties.maps[0])
+            if "price" in overrides:
+                overrides["buy_price"] = overrides["price"]
+            properties = properties.maps[-1]
+        self.prototype = CardPrototype.get(properties)
         self.sprite = sprite
-        self.properties = properties.copy()
-        self.name = properties["name"]
-        if self.properties.get("type") == "buildable":
+        self.properties = ChainMap(overrides, self.prototype.properties)
+        self.name = self.prototype.name
+        if self.prototype.properties.get("type") == "buildable":
             if hasattr(for_buildable, "copy"):
                 self.buildable_sprite = for_buildable.copy()
             else:
                 self.buildable_sprite = for_buildable
-        self.properties["buy_price"] = properties.get("price", 0)
         # If no initial position is provided, start at the target position.
         self.pos = pygame.math.Vector2(init_pos if init_pos is not None else target_position)
         self.target_position = pygame.math.Vector2(target_position)
         self.card_size = card_size
         self.rect = pygame.Rect(self.pos.x, self.pos.y, card_size[0], card_size[1])
-        self.flags = properties.get("flags", {}).copy()
-        self.effects = [{
-            "name": effect.get("effect", None),
-            "effect": effects.get_card_function(effect.get("effect", None)),
-            "negative_effect": effects.get_card_function(effect.get("effect", None), negative=True),
-            "trigger": effect.get("trigger", "use"),
-            "usage": effect.get("usage", "passive"),
-            "is_negative": effect.get("negative", False),
-            "duration": effect.get("duration", 0),
-            "params": effect.get("params", []).copy()
-        } for effect in properties.get("effects", [])]
+        self.flags = ChainMap({}, self.prototype.flags)
+        self._effects = None
         self.active = False
         self.duration = 0
         self.dragging = False
         self.highlighted = False
         self.visibility = True
 
+    @property
+    def effects(self):
+        """Effect records of the card, bound to it when they are first needed."""
+        if self._effects is None:
+            self._effects = [effect.for_card(self) for effect in self.prototype.effects]
+        return self._effects
+
     def use(self):
         """activate all usage:active trigger:use\n
         recall all usage:passive trigger:use (=self.sell) is assumed to be called too"""
 
         called = []
         for effect in self.effects:
-            if effect["usage"] == "active" and effect["trigger"] == "use":
-                if effects.call(effect, card=self):
+            if effect.usage == "active" and effect.trigger == "use":
+                if effect.call():
                     called.append(effect)
                 else:
                     break
         else:
             self.active = True
-            self.duration = max(e["duration"] for e in self.effects)
+            self.duration = max(e.duration for e in self.effects)
             return True
         for effect in called:
-            if not effects.recall(effect, card=self):
+            if not effect.recall():
                 raise RuntimeError("Failed to recall just called effect (?) probably a design error")
         return False
 
     def end_use(self):
         """recall all usage:active trigger:use"""
         for effect in self.effects:
-            if effect["usage"] == "active" and effect["trigger"] == "use":
-                if not effects.recall(effect, card=self):
+            if effect.usage == "active" and effect.trigger == "use":
+                if not effect.recall():
                     raise RuntimeError("Failed to recall lasting effect (?) probably a design error")
         return True
 
@@ -78,16 +108,16 @@ class InventoryItem:
             return self.sell(negative=True) and self.sell(negative=False)
         called = []
         for effect in self.effects:
-            if negative and effect["is_negative"] or not negative and not effect["is_negative"]:
-                if effect["usage"] == "passive" and effect["trigger"] == "use":
-                    if effects.call(effect, card=self):
+            if negative and effect.is_negative or not negative and not effect.is_negative:
+                if effect.usage == "passive" and effect.trigger == "use":
+                    if effect.call():
                         called.append(effect)
                     else:
                         break
         else:
             return True
         for effect in called:
-            if not effects.recall(effect, card=self):
+            if not effect.recall():
                 raise RuntimeError("Failed to recall just called effect (?) probably a design error")
         return False
 
@@ -98,24 +128,24 @@ class InventoryItem:
         recalled = []
         called = []
         for effect in self.effects:
-            if negative and effect["is_negative"] or (not negative and not effect["is_negative"]):
-                if effect["usage"] == "passive" and effect["trigger"] == "use":
-                    if effects.recall(effect, card=self):
+            if negative and effect.is_negative or (not negative and not effect.is_negative):
+                if effect.usage == "passive" and effect.trigger == "use":
+                    if effect.recall():
                         recalled.append(effect)
                     else:
                         break
-                if effect["trigger"] == "sell":
-                    if effects.call(effect, card=self):
+                if effect.trigger == "sell":
+                    if effect.call():
                         called.append(effect)
                     else:
                         break
         else:
             return True
         for effect in recalled:
-            if not effects.call(effect, card=self):
+            if not effect.call():
                 raise RuntimeError("Failed to call just recalled effect (?) probably a design error")
         for effect in called:
-            if not effects.recall(effect, card=self):
+            if not effect.recall():
                 raise RuntimeError("Failed to call just recalled effect (?) probably a design error")
         return False
 
@@ -164,7 +194,7 @@ class InventoryItem:
             pygame.draw.rect(surface, color, rect, border_radius=5)
             pygame.draw.rect(surface, (255, 255, 255), rect, 2, border_radius=5)
             # Draw the item name centered at the top of the card.
-            font = pygame.font.Font(fontfile, 20)
+            font = get_font(20)
             text_surface = multiline_in_rect(loc(self.name), font, rect, (0, 0, 0))
             x = rect.x + (rect.width - text_surface.get_width()) / 2
             y = rect.y + 5
@@ -173,7 +203,7 @@ class InventoryItem:
         if self.active:
             max_left = 0
             for effect in self.effects:
-                max_left = max(max_left, effect["duration"])
+                max_left = max(max_left, effect.duration)
             angle = int(360 * (1 - max_left / self.duration)) if self.duration > 0 else 0
             if angle > 0:
                 overlay = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
@@ -195,8 +225,12 @@ class Inventory:
     Base Inventory class for an arbitrary shaped table.
     In this version, items are considered immutable – they follow a fixed layout.
     """
+    # Effect usage indexed into self.listeners, None for inventories whose cards never listen (shop, packs).
+    listen_usage = None
+
     def __init__(self):
         self.items = []
+        self.listeners = {}
         self.dragging_item = None
         self.clicked_item = None
         self.context = ContextWindow()
@@ -204,12 +238,26 @@ class Inventory:
     def collect_names(self):
         return [item.name for item in self.items]
 
+    def reindex(self):
+        """Rebuilds the event -> [(card, effect)] index used by PinballGame.callback, in item order.
+        Must be called whenever self.items is changed or reordered directly."""
+        if self.listen_usage is None:
+            return
+        listeners = {}
+        for item in self.items:
+            for effect in item.effects:
+                if effect.usage == self.listen_usage:
+                    listeners.setdefault(effect.trigger, []).append((item, effect))
+        self.listeners = listeners
+
     def add_item(self, item: InventoryItem):
         self.items.append(item)
+        self.reindex()
 
     def remove_item(self, item: InventoryItem):
         if item in self.items:
             self.items.remove(item)
+            self.reindex()
 
     def update(self, dt):
         for item in self.items:
@@ -277,6 +325,8 @@ class PlayerInventory(Inventory):
     Inherited PlayerInventory class where items are permutable.
     Items are arranged strictly vertically and can be dragged to re-order.
     """
+    listen_usage = "passive"
+
     def __init__(self, slot_height=170, slot_margin=10, overrides=None):
         super().__init__()
         self.config = game_context.game.config
@@ -293,6 +343,7 @@ class PlayerInventory(Inventory):
             self.height = overrides.get("height", self.height)
             self.max_size = overrides.get("max_size", self.max_size)
             self.explicit = True
+            self.listen_usage = "active"
             self.deletion_zone = None
         self.slot_height = slot_height
         self.slot_margin = slot_margin
@@ -375,6 +426,7 @@ class PlayerInventory(Inventory):
                     original_chosen = self.items[self.chosen_item]
                 # After dropping, re-sort the items based on their current y-positions.
                 self.items.sort(key=lambda x: x.pos.y)
+                self.reindex()
                 if original_chosen is not None:
                     self.chosen_item = self.items.index(original_chosen)
                 self.recalculate_targets()
@@ -457,7 +509,7 @@ class PlayerInventory(Inventory):
                 self.context.set_visibility(True)
 
     def draw(self, surface):
-        font = pygame.font.Font(fontfile, 25)
+        font = get_font(25)
         if self.deletion_zone is not None:
             alpha_surface = pygame.Surface(self.deletion_zone.size, pygame.SRCALPHA)
             alpha_surface.fill((0, 0, 0, 0))
@@ -467,7 +519,7 @@ class PlayerInventory(Inventory):
                                               (self.deletion_zone.height - text_surface.get_height()) / 2))
             surface.blit(alpha_surface, self.deletion_zone.topleft)
 
-            font = pygame.font.Font(fontfile, 16)
+            font = get_font(16)
             fullness = multiline(f"{len(self.items)} / {self.max_size}", font, (255, 255, 255, 255), justification=1)
             surface.blit(fullness, (self.position.x, self.position.y - 20))
         super().draw(surface)
@@ -1,10 +1,15 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
 import sys
 sys.path.append(SPECPATH)
 
 from PyInstaller.utils.hooks import collect_submodules
+import effects
 
-hiddenimports = ['object_functions', 'card_functions', 'functionals']
+# The effect packages can not be scanned inside the bundle, so their module lists are frozen here.
+effects.write_snapshot(os.path.join(SPECPATH, effects.snapshot_module + '.py'))
+
+hiddenimports = ['object_functions', 'card_functions', 'functionals', effects.snapshot_module]
 hiddenimports += collect_submodules('object_functions')
 hiddenimports += collect_submodules('card_functions')
 hiddenimports += collect_submodules('functionals')
@@ -6,17 +6,11 @@ def effect(difference, mode, arbiters=None):
         if arb.shape.type not in ["ball", "flipper"] and arb.cooldown == 0:
             is_bump = False
             for e in arb.effects:
-                if e["name"] == "bump":
+                if e.name == "bump":
                     is_bump = True
                     if mode == "s":
-                        e["params"][0] += difference
+                        e.set_params((e.params[0] + difference,) + e.params[1:])
                     else:
-                        e["params"][0] *= difference
+                        e.set_params((e.params[0] * difference,) + e.params[1:])
             if not is_bump and mode == "s":
-                arb.effects.append({
-                    "name": "bump",
-                    "effect": effects.get_object_function("bump"),
-                    "params": [difference, 0],
-                    "trigger": "collision",
-                    "cooldown": 0.3
-                })
+                arb.add_effect(effects.ObjectEffect("bump", "collision", [difference, 0], 0.3))
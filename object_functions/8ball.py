@@ -1,4 +1,3 @@
-import random
 import game_context
 
 
@@ -14,12 +13,12 @@ def effect(score, chance, arbiters=None):
             hits = arb.flags["hits"]
             needed = 0
             for eff in arb.effects:
-                if eff["name"] == "8ball_lost":
-                    needed = eff["params"][0]
+                if eff.name == "8ball_lost":
+                    needed = eff.params[0]
     if hits < needed:
         game.round_instance.immediate["hits"].append((str(hits), (255, 0, 0)))
     elif hits == needed:
         game.round_instance.immediate["hits"].append((str(hits), (10, 255, 100)))
-    if random.random() < chance:
+    if game.rng.physics.random() < chance:
         game.round_instance.immediate["score"] += score
     return True
@@ -1,6 +1,6 @@
 def effect(obj_name, flags_name, flags_val, mode, arbiters=None):
     for arb in arbiters:
-        if arb.config["name"] == obj_name:
+        if arb.config.name == obj_name:
             if mode == 'e':
                 arb.flags[flags_name] = flags_val
             if mode == 's':
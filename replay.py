@@ -0,0 +1,173 @@
+"""
+replay.py
+Compact input recordings of a round, keyed by physics step index.
+
+The launch key and both flipper keys are packed into a bitmask per physics step and run-length
+encoded; card sell/use and round finish actions are stored with their step index. Together with
+the run seed and a description of the board they allow the round to be played back
+deterministically with simulation.ReplayController.
+
+usage:
+    python replay.py last_round.pbr [--repeat N]
+"""
+import json
+import struct
+import zlib
+
+MAGIC = b"PBRP"
+VERSION = 1
+LAUNCH, LEFT, RIGHT = 1, 2, 4
+ACTIONS = ["sell", "use", "finish"]
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    """
+    Input recording of one round.
+
+    Attributes:
+        seed (int): Run seed, see game_random.RunRandom.
+        round_index (int): Round number, selects the physics random stream.
+        scenario (dict): Board layout, balls, cards, flags and money at the start of the round.
+        runs (list): [mask, length] pairs of the run-length encoded input bitmask.
+        actions (list): (step, action, inventory index) tuples.
+        steps (int): Number of recorded physics steps.
+    """
+
+    def __init__(self, seed, round_index, scenario):
+        self.seed = seed
+        self.round_index = round_index
+        self.scenario = scenario
+        self.runs = []
+        self.actions = []
+        self.steps = 0
+
+    @classmethod
+    def capture(cls, game):
+        """Creates an empty recording of the round the game is about to play."""
+        scenario = {
+            "board_objects": game.field.layout(),
+            "balls": [ball.config.key for ball in game.field.balls],
+            "cards": [item.name for item in game.inventory.items],
+            "flags": dict(game.flags),
+            "money": game.money,
+            "round": game.round
+        }
+        return cls(game.rng.seed, game.round, scenario)
+
+    def record(self, launch, left, right):
+        """Records the input state of the next physics step."""
+        mask = LAUNCH * bool(launch) | LEFT * bool(left) | RIGHT * bool(right)
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+        self.steps += 1
+
+    def record_action(self, step, action, index=0):
+        self.actions.append((step, action, index))
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        scenario = zlib.compress(json.dumps(self.scenario).encode())
+        out += struct.pack("<BqHII", VERSION, self.seed, self.round_index, self.steps, len(scenario))
+        out += scenario
+        _write_varint(out, len(self.runs))
+        for mask, length in self.runs:
+            out.append(mask)
+            _write_varint(out, length)
+        _write_varint(out, len(self.actions))
+        last_step = 0
+        for step, action, index in self.actions:
+            _write_varint(out, step - last_step)
+            out.append(ACTIONS.index(action))
+            _write_varint(out, index)
+            last_step = step
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a replay file")
+        version, seed, round_index, steps, scenario_size = struct.unpack_from("<BqHII", data, 4)
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+        pos = 4 + struct.calcsize("<BqHII")
+        scenario = json.loads(zlib.decompress(data[pos:pos + scenario_size]))
+        replay = cls(seed, round_index, scenario)
+        replay.steps = steps
+        pos += scenario_size
+        count, pos = _read_varint(data, pos)
+        for _ in range(count):
+            mask = data[pos]
+            length, pos = _read_varint(data, pos + 1)
+            replay.runs.append([mask, length])
+        count, pos = _read_varint(data, pos)
+        step = 0
+        for _ in range(count):
+            delta, pos = _read_varint(data, pos)
+            action = ACTIONS[data[pos]]
+            index, pos = _read_varint(data, pos + 1)
+            step += delta
+            replay.actions.append((step, action, index))
+        return replay
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+def play(replay, record=False):
+    """Plays a replay back headlessly and returns the finished HeadlessGame."""
+    from simulation import HeadlessGame, ReplayController
+
+    scenario = replay.scenario
+    game = HeadlessGame(replay.seed)
+    game.setup(board_objects=scenario["board_objects"], balls=scenario["balls"], cards=scenario["cards"],
+               round_index=replay.round_index, flags=scenario["flags"], money=scenario["money"])
+    game.play_round(ReplayController(replay), replay.steps * game.config.max_dt, record=record)
+    return game
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Play a round replay back without a display.")
+    parser.add_argument("path", help="replay file")
+    parser.add_argument("--repeat", type=int, default=1, help="play the replay this many times")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        game = play(replay)
+        print(f"score {game.round_instance.score}, money {game.money}, {replay.steps} steps "
+              f"in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
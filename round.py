@@ -1,21 +1,23 @@
 import sys
-import random
+from collections import Counter
 import pygame
 import pymunk
 
 from inventory import PlayerInventory
-from game_effects import HitEffect, DisappearingItem
-from utils.textures import display_screen
-from utils.text import format_number
+from game_effects import BaseEffect, HitEffect, DisappearingItem
+from utils.textures import display_screen, scale_cache
+from utils.text import format_number, get_font
 import screens
-from config import fontfile
 from save_system import save
+from replay import Replay
 import game_context
 
 
 class PinballRound:
-    def __init__(self):
+    def __init__(self, headless=False, record=False):
         game = game_context.game
+        self.headless = headless
+        self.replay = Replay.capture(game) if record else None
         self.screen = game.screen
         self.config = game.config
         self.real_fps = self.config.fps
@@ -31,16 +33,20 @@ class PinballRound:
             spacing = 35
         self.ball_queue_coords = [self.config.ball_queue_lower_y - (len(self.ball_queue) - i) * spacing
                                   for i in range(len(self.ball_queue))]
-        random.shuffle(self.ball_queue)
+        game.rng.begin_round(game.round)
+        game.rng.physics.shuffle(self.ball_queue)
         self.running = False
         self.active_balls = []
         self.ball_launched = False
         self.launch_charge = 0.0
         self.launch_indicators = 0
         self.launch_key_down = False
+        self.launch_held = False
+        self.flippers = (False, False)
 
         self.score = 0
         self.hit_effects = []
+        self.hit_counts = Counter()
         self.applied_cards = PlayerInventory(overrides=self.config.applied_effects_settings)
         self.immediate = {}
 
@@ -49,6 +55,19 @@ class PinballRound:
         self.field.space.add_collision_handler(2, 3).begin = lambda arbiter, space, data: False
 
         self.time_accumulator = 0
+        self.dropped_time = 0
+        self.steps = 0
+        # Changed screen areas of the last frame, the next one has to repaint them too.
+        self.presented_rects = []
+        self.full_redraw = True
+
+    def show_hit(self, pos, text, color):
+        if not self.headless:
+            self.hit_effects.append(HitEffect(pos, text, color))
+
+    def show_disappearing(self, item, lifetime):
+        if not self.headless:
+            self.hit_effects.append(DisappearingItem(item, lifetime))
 
     def collision(self, arbiter, _space, _data):
         game = game_context.game
@@ -69,6 +88,7 @@ class PinballRound:
                     pos = shape.body.position
                     arbiters.append(shape.parent)
                     shape.parent.activations += 1
+                    self.hit_counts[shape.parent] += 1
                     x = pos.x + 20
                     y = pos.y
         game.callback("collision", arbiters=arbiters)
@@ -85,18 +105,18 @@ class PinballRound:
                 s_str = f"{'+' if add >= 0 else '-'}{s_v} X {m_v}"
             else:
                 s_str = f"{'+' if add >= 0 else '-'}{s_v}"
-            self.hit_effects.append(HitEffect((x+self.field.position[0], y+self.field.position[1]), s_str, (0, 255, 0)
-            if add > 0 else (255, 0, 0)))
+            self.show_hit((x+self.field.position[0], y+self.field.position[1]), s_str, (0, 255, 0)
+                          if add > 0 else (255, 0, 0))
             y += 20
             self.score += add
         if self.immediate['money']:
             m_v = format_number(self.immediate['money'])
-            self.hit_effects.append(HitEffect((x+self.field.position[0], y+self.field.position[1]),
-                                              f"{'+' if self.immediate['money'] >= 0 else ''}{m_v}", (255, 255, 0)))
+            self.show_hit((x+self.field.position[0], y+self.field.position[1]),
+                          f"{'+' if self.immediate['money'] >= 0 else ''}{m_v}", (255, 255, 0))
             y += 20
             game.money += self.immediate['money']
         for hit, color in self.immediate['hits']:
-            self.hit_effects.append(HitEffect((x+self.field.position[0], y+self.field.position[1]), hit, color))
+            self.show_hit((x+self.field.position[0], y+self.field.position[1]), hit, color)
             y += 20
         return True
 
@@ -113,15 +133,167 @@ class PinballRound:
         self.launch_key_down = False
         return True
 
-    def draw(self, dt):
+    def set_launch(self, pressed):
+        """Apply the launch key state: pressing starts charging the spring, releasing launches the charged ball."""
+        if pressed == self.launch_held:
+            return
+        self.launch_held = pressed
+        if self.ball_launched:
+            return
+        if pressed:
+            self.launch_key_down = True
+        elif self.launch_key_down:
+            for ball in self.active_balls:
+                if ball.body.position.y > self.config.bottom_wall_y - ball.radius * 2:
+                    impulse = min(self.launch_charge, self.config.launch_max_impulse)
+                    ball.body.apply_impulse_at_local_point((0, -impulse), (0, 0))
+                    game_context.game.sound.play("launch")
+            self.launch_charge = 0
+            self.launch_key_down = False
+
+    def set_flippers(self, left, right):
+        self.flippers = (left, right)
+        self.field.left_flipper.spring.rest_angle = (self.field.left_flipper.active_angle if left
+                                                     else self.field.left_flipper.default_angle)
+        self.field.right_flipper.spring.rest_angle = (self.field.right_flipper.active_angle if right
+                                                      else self.field.right_flipper.default_angle)
+
+    def sell_card(self, item):
         game = game_context.game
-        # Clear screen.
-        self.screen.fill((20, 20, 70))
-        field_surface = self.field.draw()
+        if self.replay is not None:
+            self.replay.record_action(self.steps, "sell", self.inventory.items.index(item))
+        if self.inventory.remove_item(item):
+            game.money += item.properties["price"]
+            self.show_disappearing(item, 0.5)
+            game.sound.play("coins+")
+            return True
+        return False
+
+    def use_card(self, item):
+        if self.replay is not None:
+            self.replay.record_action(self.steps, "use", self.inventory.items.index(item))
+        allow = False
+        lasting = False
+        for effect in item.effects:
+            if effect.usage == "active":
+                allow = True
+            if effect.duration != 0:
+                lasting = True
+        if allow and item.use() and self.inventory.remove_item(item):
+            if lasting:
+                self.applied_cards.add_item(item)
+                self.applied_cards.recalculate_targets()
+            self.show_disappearing(item, 0.5)
+            return True
+        return False
+
+    def step(self):
+        """Advance the round by one fixed physics step of config.max_dt.
+
+        Returns "round_over" when there are no balls left, otherwise None.
+        """
+        game = game_context.game
+        dt = self.config.max_dt
+        if self.replay is not None:
+            self.replay.record(self.launch_held, *self.flippers)
+        self.steps += 1
+
+        for ball in self.active_balls[:]:
+            if ball.body.position.y > self.config.screen_height + 15:
+                ball.remove(self.field.space)
+                self.active_balls.remove(ball)
+                game.sound.play('buzz_high', 'round')
+                game.callback("ball_lost", arbiters=[ball])
+
+        if len(self.active_balls) == 0 and not self.recharge():
+            return "round_over"
+
+        # Ramp gate control.
+        all_launched = True
+        for ball in self.active_balls:
+            if ball.body.is_sleeping and self.ball_launched:
+                bbs = self.field.space.bb_query(ball.shape.bb, pymunk.ShapeFilter(1))
+                for other in bbs:
+                    if other.body is not ball.body and other.collision_type == 2:
+                        if ball.shape.shapes_collide(other).points:  # non‐empty list means real contact
+                            other.parent.activations = 10
+                            game.callback("cooldown", arbiters=[other.parent])
+                ball.body.activate()
+            ball.update(dt)
+            if ball.body.velocity.length > ball.max_speed:
+                ball.body.velocity = ball.body.velocity * (ball.max_speed / ball.body.velocity.length)
+            if ball.body.position.x > self.config.right_wall_x:
+                xb = ball.body.position.x
+                x0 = self.config.right_wall_x
+                x1 = self.config.launch_ramp_wall_x
+                y0 = self.config.bottom_opening_top
+                y1 = self.config.bottom_opening_bottom
+                line = y0 + (y1 - y0) * (xb - x0) / (x1 - x0)
+                if ball.body.position.y + ball.radius < line - 5:
+                    self.field.ramp_recline.sensor = False
+                if ball.body.position.y - ball.radius > line + 5:
+                    self.field.ramp_recline.sensor = True
+                self.field.ramp_gate.sensor = True
+                all_launched = False
+                if game.flags.get("charge_bonus", False):
+                    self.launch_indicators = min(max((self.config.ramp_recline_end[1] - 40 - ball.body.position.y +
+                                                      ball.radius) // 25, self.launch_indicators), 10)
+
+        if all_launched and not self.ball_launched:
+            self.field.ramp_gate.sensor = False
+            self.ball_launched = True
+            if game.flags.get("charge_bonus", False) and self.active_balls[0].body.position.y >\
+                    self.config.ramp_recline_end[1] - 50:
+                bonus = self.launch_indicators * self.config.charge_bonus
+                if bonus > 0:
+                    game.sound.play('coins+')
+                    game.money += bonus
+                bonus = str(int(bonus)) if bonus == int(bonus) else str(bonus)
+                self.show_hit((self.field.position[0] + self.config.right_wall_x + 12,
+                               self.field.position[1] + self.config.ramp_recline_end[1] - 40
+                               - self.launch_indicators * 25), '$'+bonus, (255, 255, 0))
+            self.launch_indicators = 0
+
+        if self.ui is not None:
+            if self.score >= game.score_needed and self.ui.mode != "round_finishable":
+                self.ui.change_mode("round_finishable")
+            if self.score < game.score_needed and self.ui.mode == "round_finishable":
+                self.ui.change_mode("round")
+
+        # Simulate game physics.
+        if not self.ball_launched and self.launch_key_down:
+            self.launch_charge += dt * self.config.launch_charge_rate
+            self.launch_charge = min(self.launch_charge, self.config.launch_max_impulse)
+        self.field.update(dt)
 
         # Update board objects
-        for obj in self.field.objects:
-            obj.update(dt)
+        self.field.update_objects(dt)
+
+        for card in self.applied_cards.items[:]:
+            all_active = True
+            for effect in card.effects:
+                if effect.duration < 0:
+                    continue
+                effect.duration = max(0, effect.duration - dt)
+                if effect.duration == 0:
+                    all_active = False
+                    break
+            if not all_active:
+                card.end_use()
+                self.applied_cards.remove_item(card)
+                self.show_disappearing(card, 0.5)
+        return None
+
+    def save_render_state(self):
+        for obj in self.active_balls + [self.field.left_flipper, self.field.right_flipper]:
+            obj.save_state()
+
+    def draw(self, dt, alpha=1.0):
+        """Draw the round, with moving objects interpolated `alpha` of the way into the current physics step."""
+        game = game_context.game
+        # Clear screen.
+        self.screen.fill((20, 20, 70))
+        field_surface = self.field.draw(alpha)
 
         if game.flags.get("charge_bonus", False):
             for i in range(10):
@@ -133,21 +305,11 @@ class PinballRound:
                                                                        self.config.ramp_recline_end[1] - 40 - i * 25))
 
         for ball in self.active_balls:
-            ball.draw(field_surface)
-
-        for card in self.applied_cards.items[:]:
-            all_active = True
-            for effect in card.effects:
-                if effect["duration"] < 0:
-                    continue
-                effect["duration"] = max(0, effect["duration"] - dt)
-                if effect["duration"] == 0:
-                    all_active = False
-                    break
-            if not all_active:
-                card.end_use()
-                self.applied_cards.remove_item(card)
-                self.hit_effects.append(DisappearingItem(card, 0.5))
+            ball.draw(field_surface, alpha)
+        dirty = [ball.bounds(alpha) for ball in self.active_balls]
+        dirty += [flipper.bounds(alpha) for flipper in (self.field.left_flipper, self.field.right_flipper)]
+        dirty += self.field.dirty_rects
+        dirty.append(pygame.Rect(self.config.launch_indicator_pos, self.config.launch_indicator_size))
 
         # Draw the launch indicator.
         if self.textures.get("spring") is not None:
@@ -174,10 +336,13 @@ class PinballRound:
             ball.draw(field_surface)
 
         self.screen.blit(field_surface, self.field.position)
+        dirty = [rect.move(self.field.position) for rect in dirty]
 
         self.ui.draw(self.screen)
         self.ui.update(dt)
+        self.inventory.update(dt)
         self.inventory.draw(self.screen)
+        self.applied_cards.update(dt)
         self.applied_cards.draw(self.screen)
 
         for splash in self.immediate.get("splash", []):
@@ -185,19 +350,37 @@ class PinballRound:
                                               splash[2], splash[3]))
 
         # Draw hit effects.
-        for effect in self.hit_effects[:]:
+        for effect in self.hit_effects:
             effect.update(dt)
-            effect.draw(self.screen)
-            if effect.is_dead():
-                self.hit_effects.remove(effect)
+        BaseEffect.draw_all(self.screen, self.hit_effects)
+        self.hit_effects = [effect for effect in self.hit_effects if not effect.is_dead()]
 
         if game.debug_mode:
             # Draw the FPS counter.
-            font = pygame.font.Font(fontfile, 24)
-            fps_text = font.render(f"FPS: {int(self.real_fps)}", True, (255, 255, 255))
+            font = get_font(24)
+            fps_text = font.render(f"FPS: {int(self.real_fps)}  dropped: {self.dropped_time:.2f} s  "
+                                   f"scale cache: {scale_cache.hits}/{scale_cache.hits + scale_cache.misses}", True,
+                                   (255, 255, 255))
             self.screen.blit(fps_text, (game.screen_size[0] - fps_text.get_width() - 10, 10))
-
-        display_screen(self.screen)
+            voice_stats = "  ".join(f"{name} {count}" for name, count in game.sound.voices.stats.items())
+            voice_text = font.render(f"voices: {voice_stats}", True, (255, 255, 255))
+            self.screen.blit(voice_text, (game.screen_size[0] - voice_text.get_width() - 10,
+                                          10 + fps_text.get_height()))
+
+        # Only the side panels, the moving parts of the field and the effects change from frame to frame.
+        field_left, field_right = self.field.position[0], self.field.position[0] + self.config.field_size[0]
+        dirty.append(pygame.Rect(0, 0, field_left, self.config.screen_height))
+        dirty.append(pygame.Rect(field_right, 0, self.config.screen_width - field_right, self.config.screen_height))
+        dirty += [effect.rect for effect in self.hit_effects]
+        if game.flags.get("charge_bonus", False):
+            dirty.append(pygame.Rect(field_left + self.config.right_wall_x, 0,
+                                     self.config.launch_ramp_width + 15, self.config.screen_height))
+        full = (self.full_redraw or self.field.full_redraw or game.debug_mode or self.field.hovered_item
+                or self.ui.context.visible or any(inventory.dragging_item or inventory.context.visible
+                                                  for inventory in (self.inventory, self.applied_cards)))
+        display_screen(self.screen, None if full else self.presented_rects + dirty)
+        self.presented_rects = dirty
+        self.full_redraw = False
 
     def run(self):
         game = game_context.game
@@ -212,9 +395,15 @@ class PinballRound:
         while self.running:
             self.immediate["splash"] = []
             self.time_accumulator += dt
+            if self.time_accumulator > self.config.max_frame_time:
+                # Too slow to keep up: drop the time instead of queueing ever more physics steps.
+                self.dropped_time += self.time_accumulator - self.config.max_frame_time
+                self.time_accumulator = self.config.max_frame_time
             for event in pygame.event.get():
                 ui_return = self.ui.handle_event(event)
                 if ui_return == "round_over":
+                    if self.replay is not None:
+                        self.replay.record_action(self.steps, "finish")
                     exit_option = ui_return
                     self.running = False
                     break
@@ -232,133 +421,91 @@ class PinballRound:
                                 break
                             if choice == "ui.button.settings":
                                 screens.settings_menu()
+                            self.full_redraw = True
                             _ = clock.tick(self.config.fps)
-                        elif event.key == pygame.K_SPACE and not self.ball_launched:
-                            self.launch_key_down = True
+                        elif event.key == pygame.K_SPACE:
+                            self.set_launch(True)
                         elif event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_a, pygame.K_s,
                                            pygame.K_d]:
                             game.sound.play('flipper_on')
                     case pygame.KEYUP:
-                        if event.key == pygame.K_SPACE and not self.ball_launched:
-                            if self.launch_key_down:
-                                for ball in self.active_balls:
-                                    if ball.body.position.y > self.config.bottom_wall_y - ball.radius * 2:
-                                        impulse = min(self.launch_charge, self.config.launch_max_impulse)
-                                        ball.body.apply_impulse_at_local_point((0, -impulse), (0, 0))
-                                        game.sound.play("launch")
-                                self.launch_charge = 0
-                                self.launch_key_down = False
+                        if event.key == pygame.K_SPACE:
+                            self.set_launch(False)
                         elif event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_a, pygame.K_s,
                                            pygame.K_d]:
                             game.sound.play('flipper_off')
                 ret = self.inventory.handle_event(event)
                 if ret:
-                    if "try_selling" in ret and self.inventory.remove_item(ret["try_selling"]):
-                        game.money += ret["try_selling"].properties["price"]
-                        self.hit_effects.append(DisappearingItem(ret["try_selling"], 0.5))
-                        game.sound.play("coins+")
+                    if "try_selling" in ret:
+                        self.sell_card(ret["try_selling"])
                     elif "try_using" in ret:
-                        allow = False
-                        lasting = False
-                        for effect in ret["try_using"].effects:
-                            if effect["usage"] == "active":
-                                allow = True
-                            if effect["duration"] != 0:
-                                lasting = True
-                        if allow and ret["try_using"].use() and self.inventory.remove_item(ret["try_using"]):
-                            if lasting:
-                                self.applied_cards.add_item(ret["try_using"])
-                                self.applied_cards.recalculate_targets()
-                            self.hit_effects.append(DisappearingItem(ret["try_using"], 0.5))
-
-            for ball in self.active_balls[:]:
-                if ball.body.position.y > self.config.screen_height + 15:
-                    ball.remove(self.field.space)
-                    self.active_balls.remove(ball)
-                    game.sound.play('buzz_high', 'round')
-                    game.callback("ball_lost", arbiters=[ball])
-
-            if len(self.active_balls) == 0 and not self.recharge():
-                exit_option = "round_over"
-                self.running = False
-
-            # Ramp gate control.
-            all_launched = True
-            for ball in self.active_balls:
-                if ball.body.is_sleeping and self.ball_launched:
-                    bbs = self.field.space.bb_query(ball.shape.bb, pymunk.ShapeFilter(1))
-                    for other in bbs:
-                        if other.body is not ball.body and other.collision_type == 2:
-                            if ball.shape.shapes_collide(other).points:  # non‐empty list means real contact
-                                other.parent.activations = 10
-                                game.callback("cooldown", arbiters=[other.parent])
-                    ball.body.activate()
-                ball.update(dt)
-                if ball.body.velocity.length > ball.max_speed:
-                    ball.body.velocity = ball.body.velocity * (ball.max_speed / ball.body.velocity.length)
-                if ball.body.position.x > self.config.right_wall_x:
-                    xb = ball.body.position.x
-                    x0 = self.config.right_wall_x
-                    x1 = self.config.launch_ramp_wall_x
-                    y0 = self.config.bottom_opening_top
-                    y1 = self.config.bottom_opening_bottom
-                    line = y0 + (y1 - y0) * (xb - x0) / (x1 - x0)
-                    if ball.body.position.y + ball.radius < line - 5:
-                        self.field.ramp_recline.sensor = False
-                    if ball.body.position.y - ball.radius > line + 5:
-                        self.field.ramp_recline.sensor = True
-                    self.field.ramp_gate.sensor = True
-                    all_launched = False
-                    if game.flags.get("charge_bonus", False):
-                        self.launch_indicators = min(max((self.config.ramp_recline_end[1] - 40 - ball.body.position.y +
-                                                          ball.radius) // 25, self.launch_indicators), 10)
-
-            if all_launched and not self.ball_launched:
-                self.field.ramp_gate.sensor = False
-                self.ball_launched = True
-                if game.flags.get("charge_bonus", False) and self.active_balls[0].body.position.y >\
-                        self.config.ramp_recline_end[1] - 50:
-                    bonus = self.launch_indicators * self.config.charge_bonus
-                    if bonus > 0:
-                        game.sound.play('coins+')
-                        game.money += bonus
-                    bonus = str(int(bonus)) if bonus == int(bonus) else str(bonus)
-                    self.hit_effects.append(HitEffect((self.field.position[0] + self.config.right_wall_x + 12,
-                                                       self.field.position[1] + self.config.ramp_recline_end[1] - 40
-                                                       - self.launch_indicators * 25), '$'+bonus, (255, 255, 0)))
-                self.launch_indicators = 0
+                        self.use_card(ret["try_using"])
 
             keys = pygame.key.get_pressed()
-            self.field.left_flipper.spring.rest_angle = (self.field.left_flipper.active_angle if keys[pygame.K_LEFT]
-                                                         or keys[pygame.K_a] or keys[pygame.K_s] or keys[pygame.K_DOWN]
-                                                         else self.field.left_flipper.default_angle)
-            self.field.right_flipper.spring.rest_angle = (self.field.right_flipper.active_angle if keys[pygame.K_RIGHT]
-                                                          or keys[pygame.K_d] or keys[pygame.K_s] or keys[pygame.K_DOWN]
-                                                          else self.field.right_flipper.default_angle)
-            if self.score >= game.score_needed and self.ui.mode != "round_finishable":
-                self.ui.change_mode("round_finishable")
-            if self.score < game.score_needed and self.ui.mode == "round_finishable":
-                self.ui.change_mode("round")
-
-            # Simulate game physics.
-            while self.time_accumulator >= self.config.max_dt:
-                if not self.ball_launched and self.launch_key_down:
-                    self.launch_charge += self.config.max_dt * self.config.launch_charge_rate
-                    self.launch_charge = min(self.launch_charge, self.config.launch_max_impulse)
-
-                self.field.update(self.config.max_dt)
-                self.inventory.update(self.config.max_dt)
-                self.applied_cards.update(self.config.max_dt)
+            self.set_flippers(keys[pygame.K_LEFT] or keys[pygame.K_a] or keys[pygame.K_s] or keys[pygame.K_DOWN],
+                              keys[pygame.K_RIGHT] or keys[pygame.K_d] or keys[pygame.K_s] or keys[pygame.K_DOWN])
 
+            while self.running and self.time_accumulator >= self.config.max_dt:
+                self.save_render_state()
+                if self.step() == "round_over":
+                    exit_option = "round_over"
+                    self.running = False
                 self.time_accumulator -= self.config.max_dt
 
-            self.draw(dt)
-            dt = clock.tick(self.config.fps) / 1000
+            self.draw(dt, self.time_accumulator / self.config.max_dt)
+            dt = clock.tick(game.render_fps) / 1000
             self.real_fps = clock.get_fps()
 
+        self.end()
+        save()
+        if self.replay is not None:
+            self.replay.save(self.config.replay_path)
+        return exit_option, self.score
+
+    def simulate(self, controller, max_time=None):
+        """Play the round without a display, font rendering or sound, as fast as the CPU allows.
+
+        Physics is stepped at the fixed config.max_dt; launch, flipper and card input comes from
+        `controller` (see simulation.Controller). Stops after `max_time` simulated seconds
+        with the "timeout" exit option.
+        """
+        game = game_context.game
+        self.running = True
+        exit_option = "timeout"
+        self.recharge()
+        game.callback("round_start", arbiters=self.field.objects + self.active_balls)
+        controller.reset(self)
+        max_steps = None if max_time is None else round(max_time / self.config.max_dt)
+
+        while self.running:
+            if max_steps is not None and self.steps >= max_steps:
+                break
+            self.immediate["splash"] = []
+            for action, index in controller.actions(self):
+                if index >= len(self.inventory.items):
+                    continue
+                if action == "sell":
+                    self.sell_card(self.inventory.items[index])
+                elif action == "use":
+                    self.use_card(self.inventory.items[index])
+            launch, left, right = controller.inputs(self)
+            self.set_launch(launch)
+            self.set_flippers(left, right)
+            if self.score >= game.score_needed and controller.finish(self):
+                if self.replay is not None:
+                    self.replay.record_action(self.steps, "finish")
+                exit_option = "round_over"
+                break
+            if self.step() == "round_over":
+                exit_option = "round_over"
+                break
+
+        self.running = False
+        self.end()
+        return exit_option, self.score
+
+    def end(self):
         for applied_effect in self.applied_cards.items:
             applied_effect.end_use()
         for ball in self.active_balls:
             ball.remove(self.field.space)
-        save()
-        return exit_option, self.score
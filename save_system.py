@@ -38,7 +38,7 @@ def save(delete=False):
             pass
         return
     cards = [item.name for item in game.inventory.items]
-    balls = [ball.config["name"] for ball in game.field.balls]
+    balls = [ball.config.key for ball in game.field.balls]
     field = []
     save_data = {
         "round": game.round,
@@ -47,7 +47,9 @@ def save(delete=False):
         "mode": game.ui.mode,
         "inventory": cards,
         "balls": balls,
-        "field": field
+        "field": field,
+        "seed": game.rng.seed,
+        "rng": game.rng.getstate()
     }
     with open(game.config.save_path, 'wb') as file:
         pickle.dump(save_data, file)
@@ -62,6 +64,8 @@ def load():
         game.round = save_data.get("round", 0)
         game.money = save_data.get("money", 0)
         game.flags = save_data.get("flags", {})
+        game.rng.reseed(save_data.get("seed"))
+        game.rng.setstate(save_data.get("rng", {}))
         game.ui.change_mode(save_data.get("mode", "round"))
 
         game.inventory = PlayerInventory()
@@ -84,16 +88,15 @@ def load():
         balls = save_data.get("balls", [])
         game.field = Field()
         game.field.balls.clear()
-        for ball_name in balls:
-            ball = None
-            for name, config in game.config.objects_settings["ball"].items():
-                if config.get("name") == ball_name:
-                    ball = name
-                    break
+        ball_classes = game.config.objects_settings["ball"]
+        for ball in balls:
+            if ball not in ball_classes:
+                # Older saves store the ball's display name instead of its class.
+                ball = next((key for key, config in ball_classes.items() if config.name == ball), None)
             if ball is None:
                 continue
             game.field.balls.append(game_objects.Ball(
                 game.config.objects_settings["ball"][ball], game.config.ball_start,
-                game.textures.get(game.config.objects_settings["ball"][ball]["texture"])))
+                game.textures.get(game.config.objects_settings["ball"][ball].texture)))
         field = save_data.get("field", [])
     return True
\ No newline at end of file
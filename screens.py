@@ -3,76 +3,78 @@ import math
 import pygame
 from game_effects import AnimatedEffect
 from inventory import InventoryItem, PackInventory
-from utils.textures import mouse_scale, display_screen
-from utils.text import format_text, loc
-from ui import Button, Ui
-from inventory import PlayerInventory
-from field import Field
-from config import fontfile
+from utils.textures import mouse_scale, display_screen, scale_cache
+from utils.text import format_text, loc, get_font, preload_fonts
+from ui import Button, MenuLoop
 import game_context
 from save_system import save, save_pref
 
 
-def overlay_menu(screen, title, options):
-    game = game_context.game
-    selected = 0
-    overlay = pygame.Surface((screen.get_width(), screen.get_height()))
-    overlay.set_alpha(180)
-    overlay.fill((0, 0, 0))
-    option_rects = []
-
-    while True:
-        mouse_pos = mouse_scale(pygame.mouse.get_pos())
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    selected = (selected - 1) % len(options)
-                elif event.key == pygame.K_DOWN:
-                    selected = (selected + 1) % len(options)
-                elif event.key == pygame.K_RETURN:
-                    game.sound.play('doubleclick')
-                    return options[selected]
-                elif event.key == pygame.K_ESCAPE:
-                    game.sound.play('doubleclick')
-                    return options[0]
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                for i, rect in enumerate(option_rects):
-                    if rect.collidepoint(mouse_pos):
-                        game.sound.play('doubleclick')
-                        return options[i]
-            elif event.type == pygame.MOUSEMOTION:
-                for i, rect in enumerate(option_rects):
-                    if rect.collidepoint(mouse_pos):
-                        selected = i
-
-        screen.blit(overlay, (0, 0))
-        font = pygame.font.Font(fontfile, 36)
-        title_text = font.render(loc(title), True, (255, 255, 255))
-        title_rect = title_text.get_rect(center=(screen.get_width() // 2, 150))
-        screen.blit(title_text, title_rect)
-        option_rects = []
-        for idx, option in enumerate(options):
-            if idx == selected:
-                opt_font = pygame.font.Font(fontfile, 42)
-                color = (255, 255, 0)
+class OverlayMenu(MenuLoop):
+    """Options listed over the dimmed screen, picked with the arrow keys and return or the mouse."""
+
+    def __init__(self, screen, title, options):
+        super().__init__(screen)
+        self.title = title
+        self.options = options
+        self.selected = 0
+        self.background = screen.copy()
+        overlay = pygame.Surface((screen.get_width(), screen.get_height()))
+        overlay.set_alpha(180)
+        overlay.fill((0, 0, 0))
+        self.background.blit(overlay, (0, 0))
+        self.option_rects = []
+
+    def state(self):
+        return self.selected
+
+    def choose(self, index):
+        game_context.game.sound.play('doubleclick')
+        self.close(self.options[index])
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.selected = (self.selected - 1) % len(self.options)
+            elif event.key == pygame.K_DOWN:
+                self.selected = (self.selected + 1) % len(self.options)
+            elif event.key == pygame.K_RETURN:
+                self.choose(self.selected)
+            elif event.key == pygame.K_ESCAPE:
+                self.choose(0)
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+            mouse_pos = mouse_scale(event.pos)
+            for i, rect in enumerate(self.option_rects):
+                if rect.collidepoint(mouse_pos):
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        self.choose(i)
+                        return
+                    self.selected = i
+
+    def draw(self, screen):
+        screen.blit(self.background, (0, 0))
+        title_text = self.text(loc(self.title), 36, (255, 255, 255))
+        screen.blit(title_text, title_text.get_rect(center=(screen.get_width() // 2, 150)))
+        self.option_rects = []
+        for idx, option in enumerate(self.options):
+            if idx == self.selected:
+                text = self.text(loc(option), 42, (255, 255, 0))
             else:
-                opt_font = pygame.font.Font(fontfile, 36)
-                color = (255, 255, 255)
-            text = opt_font.render(loc(option), True, color)
+                text = self.text(loc(option), 36, (255, 255, 255))
             rect = text.get_rect(center=(screen.get_width() // 2, 250 + idx * 50))
             screen.blit(text, rect)
-            option_rects.append(rect)
-        display_screen(screen)
+            self.option_rects.append(rect)
+
+
+def overlay_menu(screen, title, options):
+    return OverlayMenu(screen, title, options).run()
 
 
 def open_pack(items, start, kind, amount, opening_sprite):
     game = game_context.game
     clock = pygame.time.Clock()
     dt = 1.0 / (game.real_fps if game.real_fps > 1 else game.config.fps)
-    big_font = pygame.font.Font(fontfile, 36)
+    big_font = get_font(36)
     opening_inventory = PackInventory(len(items) * 150)
     for item in items:
         if item["type"] == "buildable":
@@ -80,7 +82,7 @@ def open_pack(items, start, kind, amount, opening_sprite):
             opening_inventory.add_item(InventoryItem(properties=item,
                                                      sprite=game.textures.get("buildable_pack"),
                                                      target_position=start, for_buildable=
-                                                     game.textures.get(obj_def["texture"])))
+                                                     game.textures.get(obj_def.texture)))
         else:
             opening_inventory.add_item(InventoryItem(properties=item, sprite=game.textures.get(
                 item.get("sprite")), target_position=start))
@@ -166,160 +168,106 @@ def open_pack(items, start, kind, amount, opening_sprite):
     return "continue"
 
 
-def settings_menu():
-    game = game_context.game
-    font = pygame.font.Font(fontfile, 28)
-    bigger_font = pygame.font.Font(fontfile, 30)
-    pref_running = True
-    resolution_index = game.config.resolutions.index(game.screen_size)
+class SettingsMenu(MenuLoop):
     options = ["resolution", "fullscreen", "language", "debug_mode", "back"]
-    selected_option = 0
+    # Top of each option row, rows are 30 pixels high.
+    rows = [200, 250, 300, 350, 400]
 
-    while pref_running:
-        screen_reload = False
-        lang_reload = False
-        game.screen.fill((20, 20, 70))
-        pref_text = font.render(loc("ui.text.settings"), True, (255, 255, 255))
-        resolution_text = font.render(loc("ui.settings.resolution").format(
-            game.config.resolutions[resolution_index]), True, (255, 255, 255))
-        fullscreen_text = font.render(loc("ui.settings.fullscreen").format(
-            loc("ui.settings." + ('on' if game.config.fullscreen else 'off'))),
-            True, (255, 255, 255))
-        lang_text = font.render(loc("ui.settings.language").format(
-            loc("lang_name")), True, (255, 255, 255))
-        debug_text = font.render(loc("ui.settings.debug").format(
-            loc("ui.settings." + ('on' if game.debug_mode else 'off'))),
-            True, (255, 255, 255))
-        back_text = font.render(loc("ui.settings.back"), True, (255, 255, 255))
-        match options[selected_option]:
+    def __init__(self):
+        game = game_context.game
+        super().__init__(game.screen)
+        self.resolutions = pygame.display.list_modes()
+        self.resolution_index = self.resolutions.index(game.screen_size)
+        self.selected_option = 0
+
+    def state(self):
+        game = game_context.game
+        return (self.selected_option, self.resolution_index, game.config.fullscreen, game.config.lang,
+                game.debug_mode)
+
+    def change(self, option, step=1):
+        game = game_context.game
+        match option:
             case "resolution":
-                resolution_text = bigger_font.render(loc("ui.settings.resolution").format(
-                    game.config.resolutions[resolution_index]), True, (255, 255, 0))
+                self.resolution_index = (self.resolution_index + step) % len(self.resolutions)
+                game.screen_size = self.resolutions[self.resolution_index]
+                scale_cache.clear()
+                game.display = pygame.display.set_mode(game.screen_size, (pygame.FULLSCREEN
+                                                                          if game.config.fullscreen else 0))
             case "fullscreen":
-                fullscreen_text = bigger_font.render(loc("ui.settings.fullscreen").format(
-                    loc("ui.settings." + ('on' if game.config.fullscreen else 'off'))),
-                    True, (255, 255, 0))
+                game.config.fullscreen = not game.config.fullscreen
+                scale_cache.clear()
+                game.display = pygame.display.set_mode(game.screen_size, (pygame.FULLSCREEN
+                                                                          if game.config.fullscreen else 0))
             case "language":
-                lang_text = bigger_font.render(loc("ui.settings.language").format(
-                    loc("lang_name")), True, (255, 255, 0))
+                lang = (game.config.langs.index(game.config.lang) + step) % len(game.config.langs)
+                game.config.lang = game.config.langs[lang]
+                preload_fonts()
+                game.ui.refresh_language()
             case "debug_mode":
-                debug_text = bigger_font.render(loc("ui.settings.debug").format(
-                    loc("ui.settings." + ('on' if game.debug_mode else 'off'))), True,
-                    (255, 255, 0))
+                game.debug_mode = not game.debug_mode
             case "back":
-                back_text = bigger_font.render(loc("ui.settings.back"), True, (255, 255, 0))
+                self.close()
 
-        game.screen.blit(pref_text, (game.config.screen_width // 2 - pref_text.get_width() // 2, 100))
-        game.screen.blit(resolution_text, (game.config.screen_width // 2 - resolution_text.get_width() // 2, 200))
-        game.screen.blit(fullscreen_text, (game.config.screen_width // 2 - fullscreen_text.get_width() // 2, 250))
-        game.screen.blit(lang_text, (game.config.screen_width // 2 - lang_text.get_width() // 2, 300))
-        game.screen.blit(debug_text, (game.config.screen_width // 2 - debug_text.get_width() // 2, 350))
-        game.screen.blit(back_text, (game.config.screen_width // 2 - back_text.get_width() // 2, 400))
+    def select_row(self, pos):
+        _, mouse_y = mouse_scale(pos)
+        for i, top in enumerate(self.rows):
+            if top <= mouse_y <= top + 30:
+                self.selected_option = i
 
-        for event in pygame.event.get():
-            match event.type:
-                case pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                case pygame.KEYDOWN:
-                    match event.key:
-                        case pygame.K_UP:
-                            selected_option = (selected_option - 1) % len(options)
-                        case pygame.K_DOWN:
-                            selected_option = (selected_option + 1) % len(options)
-                        case pygame.K_RETURN:
-                            match options[selected_option]:
-                                case "resolution":
-                                    resolution_index = (resolution_index + 1) % len(game.config.resolutions)
-                                    game.screen_size = game.config.resolutions[resolution_index]
-                                    screen_reload = True
-                                case "fullscreen":
-                                    game.config.fullscreen = not game.config.fullscreen
-                                    screen_reload = True
-                                case "language":
-                                    lang = (game.config.langs.index(game.config.lang) + 1) % len(game.config.langs)
-                                    game.config.lang = game.config.langs[lang]
-                                    lang_reload = True
-                                case "debug_mode":
-                                    game.debug_mode = not game.debug_mode
-                                case "back":
-                                    pref_running = False
-                        case pygame.K_ESCAPE:
-                            pref_running = False
-                    if event.key in [pygame.K_LEFT, pygame.K_RIGHT]:
-                        match options[selected_option]:
-                            case "resolution":
-                                resolution_index = (resolution_index + (2 * (event.key == pygame.K_LEFT) - 1)) \
-                                                   % len(game.config.resolutions)
-                                game.screen_size = game.config.resolutions[resolution_index]
-                                screen_reload = True
-                            case "fullscreen":
-                                game.config.fullscreen = not game.config.fullscreen
-                                screen_reload = True
-                            case "language":
-                                lang = (game.config.langs.index(game.config.lang) +
-                                        (2 * (event.key == pygame.K_LEFT) - 1)) % len(game.config.langs)
-                                game.config.lang = game.config.langs[lang]
-                                lang_reload = True
-                            case "debug_mode":
-                                game.debug_mode = not game.debug_mode
-                            case "back":
-                                pref_running = False
-                case pygame.MOUSEBUTTONDOWN:
-                    _, mouse_y = mouse_scale(event.pos)
-                    if 200 <= mouse_y <= 230:
-                        selected_option = 0
-                    elif 250 <= mouse_y <= 280:
-                        selected_option = 1
-                    elif 300 <= mouse_y <= 330:
-                        selected_option = 2
-                    elif 350 <= mouse_y <= 380:
-                        selected_option = 3
-                    elif 400 <= mouse_y <= 430:
-                        selected_option = 4
-                    match options[selected_option]:
-                        case "resolution":
-                            resolution_index = (resolution_index + 1) % len(game.config.resolutions)
-                            game.screen_size = game.config.resolutions[resolution_index]
-                            screen_reload = True
-                        case "fullscreen":
-                            game.config.fullscreen = not game.config.fullscreen
-                            screen_reload = True
-                        case "language":
-                            lang = (game.config.langs.index(game.config.lang) + 1) % len(game.config.langs)
-                            game.config.lang = game.config.langs[lang]
-                            lang_reload = True
-                        case "debug_mode":
-                            game.debug_mode = not game.debug_mode
-                        case "back":
-                            pref_running = False
-                case pygame.MOUSEMOTION:
-                    _, mouse_y = mouse_scale(event.pos)
-                    if 200 <= mouse_y <= 230:
-                        selected_option = 0
-                    elif 250 <= mouse_y <= 280:
-                        selected_option = 1
-                    elif 300 <= mouse_y <= 330:
-                        selected_option = 2
-                    elif 350 <= mouse_y <= 380:
-                        selected_option = 3
-                    elif 400 <= mouse_y <= 430:
-                        selected_option = 4
-        if lang_reload:
-            ui_mode = game.ui.mode
-            items = game.inventory.items
-            game.field = Field()
-            game.ui = Ui()
-            game.ui.change_mode(ui_mode)
-            game.inventory = PlayerInventory()
-            game.inventory.items = items
-        if screen_reload:
-            game.display = pygame.display.set_mode(game.screen_size, (pygame.FULLSCREEN
-                                                                      if game.config.fullscreen else 0))
-        display_screen(game.screen)
+    def handle_event(self, event):
+        match event.type:
+            case pygame.KEYDOWN:
+                match event.key:
+                    case pygame.K_UP:
+                        self.selected_option = (self.selected_option - 1) % len(self.options)
+                    case pygame.K_DOWN:
+                        self.selected_option = (self.selected_option + 1) % len(self.options)
+                    case pygame.K_RETURN:
+                        self.change(self.options[self.selected_option])
+                    case pygame.K_ESCAPE:
+                        self.close()
+                    case pygame.K_LEFT | pygame.K_RIGHT:
+                        self.change(self.options[self.selected_option], 2 * (event.key == pygame.K_LEFT) - 1)
+            case pygame.MOUSEBUTTONDOWN:
+                self.select_row(event.pos)
+                self.change(self.options[self.selected_option])
+            case pygame.MOUSEMOTION:
+                self.select_row(event.pos)
+
+    def draw(self, screen):
+        game = game_context.game
+        labels = [
+            loc("ui.settings.resolution").format(self.resolutions[self.resolution_index]),
+            loc("ui.settings.fullscreen").format(loc("ui.settings." + ('on' if game.config.fullscreen else 'off'))),
+            loc("ui.settings.language").format(loc("lang_name")),
+            loc("ui.settings.debug").format(loc("ui.settings." + ('on' if game.debug_mode else 'off'))),
+            loc("ui.settings.back")
+        ]
+        screen.fill((20, 20, 70))
+        pref_text = self.text(loc("ui.text.settings"), 28, (255, 255, 255))
+        screen.blit(pref_text, (game.config.screen_width // 2 - pref_text.get_width() // 2, 100))
+        for i, (label, top) in enumerate(zip(labels, self.rows)):
+            if i == self.selected_option:
+                text = self.text(label, 30, (255, 255, 0))
+            else:
+                text = self.text(label, 28, (255, 255, 255))
+            screen.blit(text, (game.config.screen_width // 2 - text.get_width() // 2, top))
+
+
+def settings_menu():
+    SettingsMenu().run()
     save_pref()
 
 
+class ResultsScreen(MenuLoop):
+    """Shows the composed screen until a click or return."""
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            self.close()
+
+
 def round_results_overlay(score, min_score):
     game = game_context.game
     game.immediate['interest'] = 0
@@ -346,7 +294,7 @@ def round_results_overlay(score, min_score):
     game.ui.update(0)
     game.screen.blit(game.field.draw(), game.field.position)
 
-    font = pygame.font.Font(fontfile, 36)
+    font = get_font(36)
     overlay = pygame.Surface((game.config.screen_width - game.config.ui_width, game.config.screen_height))
     overlay.fill((20, 20, 20))
     overlay.set_alpha(200)
@@ -390,17 +338,5 @@ def round_results_overlay(score, min_score):
             game.screen.blit(txt, (overlay.get_width() // 2 - txt.get_width() // 2 + game.config.ui_width,
                                    150 + i * 45))
         save()
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            match event.type:
-                case pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                case pygame.MOUSEBUTTONDOWN:
-                    waiting = False
-                case pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        waiting = False
-        display_screen(game.screen)
+    ResultsScreen(game.screen).run()
     return result
@@ -0,0 +1,194 @@
+"""
+shop_odds.py
+Monte Carlo analysis of the shop: card appearance odds and the reroll / interest economy.
+
+Mirrors utils.misc.choose_items (rarity by weight, then a uniform item of that rarity, without
+replacement) and the reroll pricing of PinballGame.shop_screen with NumPy arrays, so whole batches
+of shops are drawn at once. A small sample is cross-checked against the real choose_items.
+
+usage:
+    python shop_odds.py -n 1000000 --category card --target card.devil.name --money 150
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from utils.misc import RaritySampler, choose_items
+
+
+class ShopOdds:
+    """
+    The items of one shop category that choose_items can offer for the current game flags, as arrays.
+
+    Attributes:
+        names (list): Item names, indexed like the sampled item indices.
+        rarities (list): Rarities with a positive weight and a non-empty pool.
+        item_rarity (np.ndarray): Rarity index of each item.
+        weights (np.ndarray): Rarity weights.
+        sizes (np.ndarray): Number of items of each rarity.
+    """
+
+    def __init__(self, game, category, rarity_scoring=None, exclude_pool=None):
+        scoring = rarity_scoring if rarity_scoring is not None else game.config.rarities[category]
+        sampler = RaritySampler(game.config.shop_items[category], tuple(scoring))
+        sampler.refresh(scoring)
+        exclude = set(exclude_pool or ())
+        self.rarities = [rarity for rarity in sampler.weights
+                         if any(item["name"] not in exclude for item in sampler.pools[rarity])]
+        items = [item for rarity in self.rarities for item in sampler.pools[rarity] if item["name"] not in exclude]
+        self.names = [item["name"] for item in items]
+        self.item_rarity = np.array([self.rarities.index(item["rarity"]) for item in items], dtype=np.int64)
+        self.weights = np.array([sampler.weights[rarity] for rarity in self.rarities], dtype=float)
+        self.sizes = np.bincount(self.item_rarity, minlength=len(self.rarities))
+
+    def sample(self, count, shops, rng):
+        """Draws `count` unique items for each of `shops` shops. Returns a (shops, count) array of item
+        indices, -1 where the pools ran out."""
+        picks = np.full((shops, count), -1, dtype=np.int64)
+        if not self.names:
+            return picks
+        rows = np.arange(shops)
+        remaining = np.tile(self.sizes, (shops, 1))
+        taken = np.zeros((shops, len(self.names)), dtype=bool)
+        for slot in range(count):
+            weights = self.weights * (remaining > 0)
+            cumulative = weights.cumsum(axis=1)
+            total = cumulative[:, -1]
+            alive = total > 0
+            draw = rng.random(shops) * total
+            rarity = np.minimum((draw[:, None] >= cumulative).sum(axis=1), len(self.rarities) - 1)
+            nth = (rng.random(shops) * remaining[rows, rarity]).astype(np.int64)
+            candidates = (self.item_rarity[None, :] == rarity[:, None]) & ~taken
+            index = (candidates.cumsum(axis=1) > nth[:, None]).argmax(axis=1)
+            picks[alive, slot] = index[alive]
+            taken[rows[alive], index[alive]] = True
+            remaining[rows[alive], rarity[alive]] -= 1
+        return picks
+
+    def appearance(self, count, shops, rng, batch=100000):
+        """Returns the probability of each item to be among the `count` items of a shop."""
+        counts = np.zeros(len(self.names), dtype=np.int64)
+        for start in range(0, shops, batch):
+            picks = self.sample(count, min(batch, shops - start), rng)
+            counts += np.bincount(picks[picks >= 0], minlength=len(self.names))
+        return counts / shops
+
+
+def reroll_costs(start_cost, mode, multiplier, limit):
+    """Costs of the first `limit` rerolls of one shop visit, as PinballGame.shop_screen charges them."""
+    costs = []
+    cost = start_cost
+    for _ in range(limit):
+        costs.append(cost)
+        cost = cost * multiplier if mode == 'm' else cost + start_cost
+    return np.array(costs, dtype=float)
+
+
+def interest(money, rate, cap):
+    """Interest paid at the end of a round, as in screens.round_results_overlay."""
+    return np.clip(np.floor(rate * np.asarray(money, dtype=float)), 0, cap)
+
+
+def reroll_until(odds, targets, count, money, costs, shops, rng):
+    """
+    Rerolls the shop until one of the `targets` shows up or the next reroll is not affordable.
+
+    Returns:
+        tuple: (rerolls used per shop, -1 where no target was found; money spent per shop)
+    """
+    spent_after = np.concatenate(([0.0], np.cumsum(costs)))
+    affordable = int(np.searchsorted(spent_after, money, side="right")) - 1
+    target_indices = [odds.names.index(name) for name in targets if name in odds.names]
+    found_at = np.full(shops, -1, dtype=np.int64)
+    for row in range(affordable + 1):
+        searching = np.flatnonzero(found_at < 0)
+        if len(searching) == 0 or not target_indices:
+            break
+        picks = odds.sample(count, len(searching), rng)
+        found_at[searching[np.isin(picks, target_indices).any(axis=1)]] = row
+    spent = spent_after[np.where(found_at >= 0, found_at, affordable)]
+    return found_at, spent
+
+
+def cross_check(odds, game, category, count, shops, seed, rarity_scoring=None, exclude_pool=None):
+    """Draws `shops` shops with the real choose_items and returns the appearance probability of each item."""
+    scoring = rarity_scoring if rarity_scoring is not None else game.config.rarities[category]
+    rng = random.Random(seed)
+    counts = dict.fromkeys(odds.names, 0)
+    for _ in range(shops):
+        for item in choose_items(count, game.config.shop_items[category], scoring,
+                                 exclude_pool=exclude_pool, rng=rng):
+            counts[item["name"]] += 1
+    return np.array([counts[name] for name in odds.names]) / shops
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate shop odds and the reroll economy.")
+    parser.add_argument("-n", "--shops", type=int, default=1000000, help="number of simulated shops")
+    parser.add_argument("--category", default="card", help="shop category from cards.json")
+    parser.add_argument("--count", type=int, help="items per shop, defaults to config.shop_size")
+    parser.add_argument("--inventory", help="comma separated card names the player owns, never offered")
+    parser.add_argument("--target", help="comma separated item names to reroll for")
+    parser.add_argument("--money", type=float, default=100, help="money when entering the shop")
+    parser.add_argument("--reroll-start", type=float, help="first reroll cost, defaults to the start flags")
+    parser.add_argument("--reroll-mode", help="'m' doubles the cost with every reroll, anything else adds")
+    parser.add_argument("--interest-rate", type=float, help="defaults to config.interest_rate")
+    parser.add_argument("--interest-cap", type=float, help="defaults to config.interest_cap")
+    parser.add_argument("--check", type=int, default=20000, help="shops drawn with the real choose_items")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from simulation import HeadlessGame
+
+    game = HeadlessGame(args.seed)
+    config = game.config
+    categories = ["buildable", "card", "immediate", "pack"]
+    count = args.count if args.count is not None else config.shop_size[categories.index(args.category)]
+    inventory = args.inventory.split(",") if args.inventory else []
+    rng = np.random.default_rng(args.seed)
+
+    start = time.perf_counter()
+    odds = ShopOdds(game, args.category, exclude_pool=inventory)
+    probabilities = odds.appearance(count, args.shops, rng)
+    print(f"{args.shops} shops of {count} {args.category} items in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    rarity_odds = np.bincount(odds.item_rarity, weights=probabilities, minlength=len(odds.rarities)) / count
+    print("rarity share:", ", ".join(f"{rarity} {share:.1%}" for rarity, share in zip(odds.rarities, rarity_odds)))
+    for index in np.argsort(-probabilities):
+        print(f"{probabilities[index]:8.3%}  {odds.names[index]} ({odds.rarities[odds.item_rarity[index]]})")
+
+    if args.check > 0:
+        real = cross_check(odds, game, args.category, count, args.check, args.seed, exclude_pool=inventory)
+        error = np.abs(real - probabilities)
+        z = error / np.sqrt(np.maximum(probabilities * (1 - probabilities), 1e-12) / args.check)
+        print(f"cross-check with choose_items over {args.check} shops: max |difference| {error.max():.3%}, "
+              f"max z {z.max():.2f}")
+
+    rate = args.interest_rate if args.interest_rate is not None else config.interest_rate
+    cap = args.interest_cap if args.interest_cap is not None else config.interest_cap
+    start_cost = args.reroll_start if args.reroll_start is not None else game.flags["reroll_start_cost"]
+    mode = args.reroll_mode if args.reroll_mode is not None else game.flags["reroll_mode"]
+    costs = reroll_costs(start_cost, mode, config.reroll_next, 64)
+    print(f"reroll costs: {', '.join(f'{cost:g}' for cost in costs[:6])}, ...; "
+          f"interest without rerolling: {interest(args.money, rate, cap):g}")
+
+    if args.target:
+        targets = args.target.split(",")
+        found_at, spent = reroll_until(odds, targets, count, args.money, costs, min(args.shops, 1000000), rng)
+        found = found_at >= 0
+        print(f"found {'/'.join(targets)}: {found.mean():.1%}, "
+              f"in the first shop {(found_at == 0).mean():.1%}")
+        if found.any():
+            rerolls = np.bincount(found_at[found])
+            print("rerolls until found:", ", ".join(f"{i}: {n / len(found):.1%}" for i, n in enumerate(rerolls)))
+        left = args.money - spent
+        lost = interest(args.money, rate, cap) - interest(left, rate, cap)
+        print(f"money spent: mean {spent.mean():.1f}, median {np.median(spent):g}, "
+              f"90% {np.percentile(spent, 90):g}; interest lost: mean {lost.mean():.1f}")
+
+
+if __name__ == "__main__":
+    main()
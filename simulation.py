@@ -0,0 +1,228 @@
+"""
+simulation.py
+Display-free round driver for balance testing: builds a game context without a window, sprites or
+sound and plays rounds through PinballRound.simulate with input coming from a controller object.
+"""
+import os
+import random
+import pygame
+
+from config import Config
+from game_random import RunRandom
+from field import Field
+from game import PinballGame
+from game_objects import Ball
+from inventory import PlayerInventory, InventoryItem
+from round import PinballRound
+from replay import LAUNCH, LEFT, RIGHT
+import game_context
+
+
+class Controller:
+    """
+    Supplies round input, one call per physics step. The base controller never touches anything.
+    """
+
+    def reset(self, round_instance):
+        """Called once before the first step of a round."""
+
+    def actions(self, round_instance):
+        """Returns ("sell" | "use", inventory index) pairs to perform before the next physics step."""
+        return []
+
+    def inputs(self, round_instance):
+        """Returns (launch_held, left_flipper_held, right_flipper_held) for the next physics step."""
+        return False, False, False
+
+    def finish(self, round_instance):
+        """Returns True to end the round early once the required score is reached."""
+        return False
+
+
+class AutoController(Controller):
+    """
+    A simple bot: charges the spring for `charge_time` seconds, then releases it,
+    and flips a flipper whenever a falling ball gets close to it.
+
+    With an `rng`, the charge time and reach of every launch and the hold time of every flip vary by up
+    to `jitter` (a fraction of their base values), so differently seeded rounds play differently.
+    """
+
+    def __init__(self, charge_time=1.5, reach=70, hold_time=0.15, finish_early=False, rng=None, jitter=0.2):
+        self.charge_time = charge_time
+        self.reach = reach
+        self.hold_time = hold_time
+        self.finish_early = finish_early
+        self.rng = rng
+        self.jitter = jitter
+        self.launch_charge = charge_time
+        self.launch_reach = reach
+        self.charge_steps = 0
+        self.hold = [0, 0]
+
+    def vary(self, value):
+        if self.rng is None:
+            return value
+        return value * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def reset(self, round_instance):
+        self.charge_steps = 0
+        self.hold = [0, 0]
+
+    def inputs(self, round_instance):
+        config = round_instance.config
+        launch = False
+        if not round_instance.ball_launched:
+            if self.charge_steps == 0:
+                self.launch_charge = self.vary(self.charge_time)
+                self.launch_reach = self.vary(self.reach)
+            self.charge_steps += 1
+            launch = self.charge_steps * config.max_dt < self.launch_charge
+        else:
+            self.charge_steps = 0
+
+        for i, flipper_pos in enumerate((config.left_flipper_pos, config.right_flipper_pos)):
+            if self.hold[i] > 0:
+                self.hold[i] -= 1
+                continue
+            for ball in round_instance.active_balls:
+                pos = ball.body.position
+                if ball.body.velocity.y > 0 and pos.get_distance(flipper_pos) < self.launch_reach + ball.radius:
+                    self.hold[i] = round(self.vary(self.hold_time) / config.max_dt)
+                    break
+        return launch, self.hold[0] > 0, self.hold[1] > 0
+
+    def finish(self, round_instance):
+        return self.finish_early
+
+
+class ReplayController(Controller):
+    """
+    Feeds a recorded replay.Replay back into the round, step by step.
+    """
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.run = 0
+        self.left_in_run = 0
+        self.action = 0
+        self.finish_step = next((step for step, action, _ in replay.actions if action == "finish"), None)
+
+    def reset(self, round_instance):
+        self.run = 0
+        self.left_in_run = self.replay.runs[0][1] if self.replay.runs else 0
+        self.action = 0
+
+    def actions(self, round_instance):
+        actions = []
+        while self.action < len(self.replay.actions) and self.replay.actions[self.action][0] <= round_instance.steps:
+            _, action, index = self.replay.actions[self.action]
+            if action != "finish":
+                actions.append((action, index))
+            self.action += 1
+        return actions
+
+    def inputs(self, round_instance):
+        if self.run >= len(self.replay.runs):
+            return False, False, False
+        mask = self.replay.runs[self.run][0]
+        self.left_in_run -= 1
+        if self.left_in_run == 0:
+            self.run += 1
+            if self.run < len(self.replay.runs):
+                self.left_in_run = self.replay.runs[self.run][1]
+        return bool(mask & LAUNCH), bool(mask & LEFT), bool(mask & RIGHT)
+
+    def finish(self, round_instance):
+        return round_instance.steps == self.finish_step
+
+
+class SilentSound:
+    def play(self, sound_name, channel=None):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class HeadlessGame(PinballGame):
+    """
+    PinballGame without a window: no display surface, no textures, no fonts and no sound.
+    All randomness comes from `seed`. Installs itself as game_context.game.
+    """
+
+    def __init__(self, seed=None):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.display.init()
+        self.config = Config()
+        self.screen_size = self.config.base_resolution
+        self.debug_mode = False
+        self.display = None
+        self.screen = None
+        self.textures = {}
+
+        self.flags = self.config.start_flags.copy()
+        self.reroll_cost = self.flags['reroll_start_cost']
+        self.money = 0
+        self.round = 0
+        self.score_needed = self.config.min_score[self.round]
+        self.immediate = {}
+        self.real_fps = 0
+        self.cont = False
+        self.ui = None
+        self.round_instance = None
+        self.rng = RunRandom(seed)
+        self.sound = SilentSound()
+
+        game_context.game = self
+        self.inventory = PlayerInventory()
+        self.field = Field()
+
+    def setup(self, board_objects=None, balls=None, cards=None, round_index=0, flags=None, money=0):
+        """
+        Rebuilds the field and inventory for a scenario.
+
+        Args:
+            board_objects (list, optional): Field layout in the config.board_objects format.
+            balls (list, optional): Ball classes from objects.json, defaults to config.balls standard balls.
+            cards (list, optional): Card names to put into the inventory, in order.
+            round_index (int): Round number, sets the required score.
+            flags (dict, optional): Game flags, defaults to config.start_flags.
+            money (int): Starting money.
+        """
+        if flags is not None:
+            self.flags = dict(flags)
+        self.money = money
+        if board_objects is not None:
+            self.config.board_objects = [dict(obj, pos=tuple(obj["pos"])) for obj in board_objects]
+        self.field = Field()
+        if balls is not None:
+            self.field.balls = [Ball(self.config.objects_settings["ball"][name], self.config.ball_start)
+                                for name in balls]
+        self.inventory = PlayerInventory()
+        for name in cards or []:
+            for category in ["card", "buildable"]:
+                item = next((i for i in self.config.shop_items[category] if i["name"] == name), None)
+                if item is not None:
+                    self.inventory.add_item(InventoryItem(properties=item))
+                    break
+            else:
+                raise ValueError(f"Unknown card: {name}")
+        self.round = round_index
+        self.score_needed = self.config.min_score[min(round_index, len(self.config.min_score) - 1)]
+
+    def controller_random(self):
+        """Random stream for a bot controller, derived from the run seed and round but separate from
+        the game's own streams, so the bot never changes what the game draws."""
+        return random.Random(f"{self.rng.seed}:controller:{self.round}")
+
+    def play_round(self, controller=None, max_time=600, record=False):
+        """Plays one round and returns the (exit_option, score) pair of PinballRound.run.
+        Without a controller, an AutoController seeded from the run plays it."""
+        self.round_instance = PinballRound(headless=True, record=record)
+        if controller is None:
+            controller = AutoController(rng=self.controller_random())
+        return self.round_instance.simulate(controller, max_time)
@@ -1,37 +1,170 @@
+import hashlib
 import os
-import random
+import threading
 import pygame
 from config import asset_path
 
 
-class SoundEngine:
+class SoundBank:
+    """
+    Sounds by name, decoded on a background thread so the game does not wait for them at start.
+    A name maps to all files named "<name>.mp3" or "<name>-<n>.mp3" in assets/sound.
+
+    With a cache folder, the decoded PCM of each file is stored there under a hash of the file and
+    the mixer format, and later starts load the raw samples instead of decoding the MP3 again.
+    """
+
+    def __init__(self, names, cache_path=None, volume=1.0):
+        self.sounds = {}
+        self.volume = volume
+        self.cache_path = cache_path
+        self.loaded = threading.Event()
+        self._lock = threading.Lock()
+        files = sorted(os.listdir(asset_path.joinpath('sound')))
+        self._files = {name: [file for file in files if os.path.splitext(file)[0] == name
+                              or file.startswith(name + '-')] for name in names}
+        self._thread = threading.Thread(target=self._load_all, name="sound bank", daemon=True)
+        self._thread.start()
+
+    def get(self, name):
+        """Returns the loaded sounds of a name, or None while they are still decoding."""
+        return self.sounds.get(name)
+
+    def wait(self, timeout=None):
+        """Blocks until all sounds are loaded. Returns False on timeout."""
+        return self.loaded.wait(timeout)
+
+    def set_volume(self, volume):
+        with self._lock:
+            self.volume = volume
+            for sounds in self.sounds.values():
+                for sound in sounds:
+                    sound.set_volume(volume)
+
+    def _load_all(self):
+        used = set()
+        try:
+            mixer_format = repr(pygame.mixer.get_init()).encode()
+            for name, files in self._files.items():
+                sounds = [self._load(file, mixer_format, used) for file in files]
+                with self._lock:
+                    for sound in sounds:
+                        sound.set_volume(self.volume)
+                    self.sounds[name] = sounds
+            self._prune(used)
+        finally:
+            self.loaded.set()
+
+    def _load(self, file, mixer_format, used):
+        path = asset_path.joinpath('sound', file)
+        if self.cache_path is None:
+            return pygame.mixer.Sound(str(path))
+        key = hashlib.sha1(path.read_bytes() + mixer_format).hexdigest()
+        cache_file = os.path.join(self.cache_path, key + '.pcm')
+        used.add(key + '.pcm')
+        try:
+            with open(cache_file, 'rb') as cached:
+                return pygame.mixer.Sound(buffer=cached.read())
+        except OSError:
+            pass
+        sound = pygame.mixer.Sound(str(path))
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            with open(cache_file + '.tmp', 'wb') as cached:
+                cached.write(sound.get_raw())
+            os.replace(cache_file + '.tmp', cache_file)
+        except OSError:
+            pass
+        return sound
+
+    def _prune(self, used):
+        """Removes cached samples of files that changed or are gone."""
+        if self.cache_path is None or not os.path.isdir(self.cache_path):
+            return
+        for file in os.listdir(self.cache_path):
+            if file not in used:
+                try:
+                    os.remove(os.path.join(self.cache_path, file))
+                except OSError:
+                    pass
+
+
+class VoiceManager:
+    """
+    Limits the sounds played on the free mixer channels. A sound is dropped when it was already
+    started this frame or its name has `cap` voices playing. When no channel is free, the oldest voice
+    of the lowest priority is stolen if that priority is not above the new sound's, otherwise the new
+    sound is dropped.
+    """
+    # name: (cap, priority); collision sounds are cheap to lose, input feedback is not.
+    limits = {
+        'tmpchime': (3, 0),
+        'flipper_on': (2, 2),
+        'flipper_off': (2, 2),
+        'launch': (1, 3),
+        'click': (1, 3),
+        'doubleclick': (1, 3),
+    }
+    default_limit = (2, 1)
 
     def __init__(self):
+        # [channel, sound, name, priority] of the voices started last, oldest first.
+        self.voices = []
+        self.frame = set()
+        self.stats = dict.fromkeys(('played', 'stolen', 'duplicate', 'capped', 'no_voice'), 0)
+
+    def end_frame(self):
+        self.frame.clear()
+
+    def play(self, name, sound):
+        if name in self.frame:
+            self.stats['duplicate'] += 1
+            return
+        cap, priority = self.limits.get(name, self.default_limit)
+        self.voices = [voice for voice in self.voices if voice[0].get_sound() is voice[1]]
+        if sum(voice[2] == name for voice in self.voices) >= cap:
+            self.stats['capped'] += 1
+            return
+        channel = pygame.mixer.find_channel()
+        if channel is None:
+            victim = min(self.voices, key=lambda voice: voice[3], default=None)
+            if victim is None or victim[3] > priority:
+                self.stats['no_voice'] += 1
+                return
+            self.voices.remove(victim)
+            channel = victim[0]
+            self.stats['stolen'] += 1
+        channel.play(sound)
+        self.voices.append([channel, sound, name, priority])
+        self.frame.add(name)
+        self.stats['played'] += 1
+
+
+class SoundEngine:
+
+    def __init__(self, rng, cache_path=None):
         pygame.mixer.init()
-        self._files = os.listdir(asset_path.joinpath('sound'))
+        self.rng = rng
         to_load = ['tmpchime', 'flipper_on', 'flipper_off', 'launch', 'tear', 'click', 'doubleclick', 'buzz_high',
                    'buzz_low', 'coins-', 'coins+']
         channels = ['round', 'ui', 'effects']
         pygame.mixer.set_reserved(len(channels))
-        self.sounds = {name: self._load_sounds(name) for name in to_load}
+        self.sounds = SoundBank(to_load, cache_path, volume=0.2)
         self.channels = {name: pygame.mixer.Channel(i) for i,name in enumerate(channels)}
-        self.set_volume(0.2)
-
-    def _load_sounds(self, sound_name):
-        appropriate = [s for s in self._files if s.startswith(sound_name)]
-        return [pygame.mixer.Sound(str(asset_path.joinpath('sound').joinpath(file))) for file in appropriate]
+        self.voices = VoiceManager()
 
     def play(self, sound_name, channel=None):
-        if sound_name in self.sounds:
-            sound = random.choice(self.sounds[sound_name])
+        # Sounds that are not decoded yet are skipped.
+        sounds = self.sounds.get(sound_name)
+        if sounds:
+            sound = self.rng.choice(sounds)
             if channel is None:
-                sound.play()
+                self.voices.play(sound_name, sound)
             else:
                 self.channels[channel].play(sound)
-        else:
-            pass
+
+    def end_frame(self):
+        self.voices.end_frame()
 
     def set_volume(self, volume):
-        for s_l in self.sounds.values():
-            for s in s_l:
-                s.set_volume(volume)
+        self.sounds.set_volume(volume)
@@ -3,7 +3,7 @@ sprites.py
 This module defines classes for handling 2D sprites and animated sprites in a game using Pygame.
 """
 import pygame
-from utils.textures import scale, rotoscale
+from utils.textures import scaled, rotoscale
 from config import asset_path
 
 
@@ -51,15 +51,17 @@ class Sprite:
             angle (float, optional): The angle to rotate the sprite. Defaults to 0.
             alpha (int, optional): The alpha value for transparency. Defaults to 255 (opaque).
         """
-        self.texture.set_alpha(alpha)
         if size is None:
             size = self.texture.get_size()
         if angle != 0:
             rotated = rotoscale(self.texture, angle, size)
+            rotated.set_alpha(alpha)
             position = rotated.get_rect(center=position)
             surface.blit(rotated, position)
         else:
-            surface.blit(scale(self.texture, size), position)
+            texture = scaled(self.texture, size)
+            texture.set_alpha(alpha)
+            surface.blit(texture, position)
 
 
 class AnimatedSprite:
@@ -0,0 +1,197 @@
+"""
+texture_atlas.py
+Binary cache of the decoded game textures.
+
+Every texture file named in sprites.json is stored as raw 32-bit pixels in one atlas file, together
+with an index of their offsets and sizes. At start the atlas is memory-mapped and the surfaces are
+created on top of the mapping with pygame.image.frombuffer, instead of decoding and converting each
+BMP. The atlas records a hash of the texture files and is rebuilt automatically when they change;
+the files are only read for that hash when their sizes or modification times differ from the ones
+recorded with it, and new times of unchanged files are recorded. The mapping is copy-on-write, so
+textures can be drawn on like decoded ones.
+
+The pixels are stored in BGRA byte order, the layout convert_alpha gives on little-endian machines,
+so the mapped surfaces blit as fast as converted ones. Should the display use another format, the
+mapped surfaces are converted once, which still skips the BMP decoding.
+
+usage:
+    python texture_atlas.py [--out PATH] [--check]
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from config import asset_path
+
+MAGIC = b"PBTA"
+VERSION = 2
+# magic, version, sha1 of the texture file sizes and times, sha1 of the texture files, index size
+HEADER = "<4sB20s20sI"
+PIXEL_FORMAT = "BGRA"
+# Pixel data of every texture starts at a multiple of this many bytes: SDL fills and blits unaligned
+# pixels with aligned SIMD stores and crashes.
+ALIGNMENT = 64
+# Mapped atlases, kept open as long as their surfaces are alive.
+_mapped = []
+
+
+def texture_files(sprite_config):
+    """Returns the texture file names sprites.json loads, in load order and without duplicates."""
+    files = [sprite + ".bmp" for sprite in sprite_config["simple"]]
+    files += [sprite["file"] for sprite in sprite_config["animated"].values()]
+    files += [sheet + ".bmp" for sheet in sprite_config["spritesheets"]]
+    return list(dict.fromkeys(files))
+
+
+def source_stamp(files):
+    """SHA-1 of the names, sizes and modification times of the texture files."""
+    digest = hashlib.sha1()
+    for name in files:
+        stat = os.stat(asset_path.joinpath("textures", name))
+        digest.update(struct.pack("<Iqq", len(name), stat.st_size, stat.st_mtime_ns))
+        digest.update(name.encode())
+    return digest.digest()
+
+
+def source_hash(files):
+    """SHA-1 of the names and contents of the texture files."""
+    digest = hashlib.sha1()
+    for name in files:
+        data = asset_path.joinpath("textures", name).read_bytes()
+        digest.update(struct.pack("<II", len(name), len(data)))
+        digest.update(name.encode())
+        digest.update(data)
+    return digest.digest()
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def build(files, path):
+    """Decodes the texture files and writes their atlas to `path`."""
+    index = {}
+    payload = []
+    offset = 0
+    for name in files:
+        image = pygame.image.load(asset_path.joinpath("textures", name))
+        pixels = pygame.image.tobytes(image, PIXEL_FORMAT)
+        index[name] = [offset, *image.get_size()]
+        payload += [pixels, bytes(_padding(len(pixels)))]
+        offset += len(pixels) + _padding(len(pixels))
+    index = json.dumps(index).encode()
+    index += b" " * _padding(struct.calcsize(HEADER) + len(index))
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(struct.pack(HEADER, MAGIC, VERSION, source_stamp(files), source_hash(files), len(index)))
+        file.write(index)
+        file.writelines(payload)
+    os.replace(temp_path, path)
+
+
+def read(path, files):
+    """
+    Maps the atlas at `path` and returns its surfaces by file name, or None if it is missing, damaged
+    or was built from other texture files. The mapping is copy-on-write, so drawing on a texture only
+    changes this process's copy of it.
+    """
+    header_size = struct.calcsize(HEADER)
+    try:
+        with open(path, "rb") as file:
+            header = file.read(header_size)
+            if len(header) < header_size:
+                return None
+            magic, version, stamp, digest, index_size = struct.unpack(HEADER, header)
+            if magic != MAGIC or version != VERSION:
+                return None
+            new_stamp = source_stamp(files)
+            if stamp != new_stamp:
+                if digest != source_hash(files):
+                    return None
+                # Same contents with new times, e.g. after a reinstall: record them for the next start.
+                try:
+                    with open(path, "r+b") as stamped:
+                        stamped.seek(struct.calcsize("<4sB"))
+                        stamped.write(new_stamp)
+                except OSError:
+                    pass
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    start = header_size + index_size
+    surfaces = {}
+    try:
+        index = json.loads(mapping[header_size:start])
+        with memoryview(mapping) as view:
+            for name, (offset, width, height) in index.items():
+                begin = start + offset
+                if offset < 0 or begin + width * height * 4 > len(mapping):
+                    raise ValueError(f"{name} lies outside of the atlas")
+                surfaces[name] = pygame.image.frombuffer(view[begin:begin + width * height * 4], (width, height),
+                                                         PIXEL_FORMAT)
+    except (ValueError, TypeError, AttributeError):
+        # Truncated or damaged atlas, load rebuilds it.
+        surfaces.clear()
+        try:
+            mapping.close()
+        except BufferError:
+            pass
+        return None
+    _mapped.append(mapping)
+    return surfaces
+
+
+def load(sprite_config, path=None):
+    """
+    Returns the surfaces of the texture files of sprites.json by file name, from the atlas at `path`.
+    The atlas is (re)built first if it is missing or out of date; without a path, or if it can not be
+    written, the files are decoded directly.
+    """
+    files = texture_files(sprite_config)
+    surfaces = None
+    if path is not None:
+        surfaces = read(path, files)
+        if surfaces is None:
+            try:
+                build(files, path)
+            except OSError:
+                pass
+            else:
+                surfaces = read(path, files)
+    if surfaces is None:
+        return {name: pygame.image.load(asset_path.joinpath("textures", name)).convert_alpha() for name in files}
+    if pygame.display.get_surface() is not None:
+        probe = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()
+        if any(surface.get_masks() != probe.get_masks() for surface in surfaces.values()):
+            surfaces = {name: surface.convert_alpha() for name, surface in surfaces.items()}
+    return surfaces
+
+
+def main(argv=None):
+    import argparse
+    import time
+    from config import Config
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    parser = argparse.ArgumentParser(description="Build the texture atlas cache.")
+    parser.add_argument("--out", help="atlas file, defaults to the cache in the app data folder")
+    parser.add_argument("--check", action="store_true", help="only report whether the atlas is up to date")
+    args = parser.parse_args(argv)
+
+    path = args.out or Config().atlas_path
+    with open(asset_path.joinpath("config/sprites.json")) as file:
+        files = texture_files(json.load(file))
+    if args.check:
+        print(f"{path}: {'up to date' if read(path, files) is not None else 'missing or out of date'}")
+        return
+    start = time.perf_counter()
+    build(files, path)
+    print(f"{path}: {len(files)} textures, {os.path.getsize(path)} bytes in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
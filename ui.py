@@ -1,15 +1,15 @@
+import sys
 import pygame
 from game_effects import ContextWindow
-from utils.textures import mouse_scale
-from utils.text import format_text, loc
-from config import fontfile
+from utils.textures import mouse_scale, display_screen
+from utils.text import format_text, loc, get_font
 from inventory import InventoryItem
 import game_context
 
 
 class Button:
     def __init__(self, text, pos, size, color, font_size=36, offset=(0, 0)):
-        font = pygame.font.Font(fontfile, font_size)
+        font = get_font(font_size)
         self.color = color
         self.text = font.render(text, True, (0, 0, 0))
         self.button = self.text.get_rect()
@@ -55,13 +55,21 @@ class Ui:
         self.config = game_context.game.config
         self.mode = 'round'
         self.position = self.config.ui_pos
+        self.create_buttons()
+        self.context = ContextWindow()
+
+    def create_buttons(self):
         self.play_button = Button(loc("ui.button.play"), self.config.ui_continue_pos,
                                   (self.config.ui_butt_width_1, 40), (255, 255, 0), 36, offset=self.position)
         self.field_button = Button(loc("ui.button.field"), self.config.ui_field_config_pos,
                                    (self.config.ui_butt_width_2, 40), (255, 0, 100), 36, offset=self.position)
         self.reroll_button = Button(loc("ui.button.reroll"), self.config.ui_reroll_pos,
                                     (self.config.ui_butt_width_2, 40), (0, 255, 100), 36, offset=self.position)
-        self.context = ContextWindow()
+
+    def refresh_language(self):
+        """Re-renders the button texts after a language switch."""
+        self.create_buttons()
+        self.change_mode(self.mode)
 
     def change_mode(self, mode):
         assert mode in ['shop', 'round', 'round_finishable', 'field_modification', 'results']
@@ -82,7 +90,7 @@ class Ui:
 
     def draw(self, surface):
         game = game_context.game
-        font = pygame.font.Font(fontfile, 24)
+        font = get_font(24)
         ui_surface = pygame.Surface((self.config.ui_width, self.config.screen_height))
         ui_surface.fill((20, 10, 60))
         req = int(game.score_needed) if (game.score_needed == int(game.score_needed)) else game.score_needed
@@ -191,3 +199,69 @@ class Ui:
                         else:
                             print('can not spawn', loc(name))
         return None
+
+
+class MenuLoop:
+    """
+    Event loop of a menu or overlay that sits idle between inputs. It blocks on pygame.event.wait and
+    only redraws and shows the screen when `dirty` is set or `state()` changed. The wait times out
+    every `idle_timeout` ms, so state changes that do not come from events are still picked up.
+
+    Subclasses implement handle_event and draw, and call close to return a result from run.
+    """
+    idle_timeout = 500
+    redraw_events = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED)
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.dirty = True
+        self.running = True
+        self.result = None
+        # Rendered texts by (text, font size, color, language).
+        self.texts = {}
+
+    def state(self):
+        """Everything draw depends on, compared after every event to decide whether to redraw."""
+        return None
+
+    def text(self, text, size, color):
+        """Returns the text rendered in the given font size and color, rendering it only once."""
+        key = (text, size, tuple(color), game_context.game.config.lang)
+        surface = self.texts.get(key)
+        if surface is None:
+            surface = self.texts[key] = get_font(size).render(text, True, color)
+        return surface
+
+    def close(self, result=None):
+        self.result = result
+        self.running = False
+
+    def handle_event(self, event):
+        pass
+
+    def draw(self, screen):
+        pass
+
+    def run(self):
+        game = game_context.game
+        state = self.state()
+        while self.running:
+            if self.dirty:
+                self.draw(self.screen)
+                display_screen(self.screen)
+                self.dirty = False
+            for event in [pygame.event.wait(self.idle_timeout)] + pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                if event.type in self.redraw_events:
+                    self.dirty = True
+                self.handle_event(event)
+                if not self.running:
+                    break
+            game.sound.end_frame()
+            new_state = self.state()
+            if new_state != state:
+                state = new_state
+                self.dirty = True
+        return self.result
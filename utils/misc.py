@@ -1,64 +1,133 @@
-import random
 from effects import get_functional
 import sprites
+import texture_atlas
+import game_context
 
 
-def _is_allowed(card):
-    """check if the item is allowed to show up in the current game state"""
-    _allowed = [{
-        "eval": get_functional(functonal["name"]),
-        "params": functonal.get("params", [])
-    } for functonal in card.get("functional", [])]
-    if len(_allowed) == 0:
-        return True
-    for func in _allowed:
-        if not func["eval"](*func["params"]):
-            return False
-    return True
+def alias_table(weights):
+    """Builds Walker's alias table for drawing indices with the given (positive) weights in constant time.
 
+    Returns
+    -------
+    (probabilities, aliases) - index i is kept with probabilities[i], otherwise aliases[i] is drawn.
+    """
+    n = len(weights)
+    total = sum(weights)
+    scaled = [weight * n / total for weight in weights]
+    probabilities = [1.0] * n
+    aliases = list(range(n))
+    small = [i for i, value in enumerate(scaled) if value < 1]
+    large = [i for i, value in enumerate(scaled) if value >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probabilities[less] = scaled[less]
+        aliases[less] = more
+        scaled[more] -= 1 - scaled[less]
+        (small if scaled[more] < 1 else large).append(more)
+    return probabilities, aliases
 
-def choose_items(count, pool, rarity_scoring, unique=True, exclude_pool=None):
-    rarity_pools = {rarity: [] for rarity in rarity_scoring}
-    for item in pool:
-        if item["rarity"] in rarity_scoring and _is_allowed(item) and item["name"] not in (exclude_pool or []):
-            rarity_pools[item["rarity"]].append(item)
-    for rarity in list(rarity_pools.keys()):
-        if len(rarity_pools[rarity]) == 0:
-            del rarity_pools[rarity]
-    weights = [rarity_scoring[rarity]["value"] for rarity in rarity_pools]
-    weights = [sum(weights[:i])/sum(weights) for i in range(1, len(weights)+1)]
-    items = []
-    for _ in range(count):
-        rnd = random.random()
-        for i, w in enumerate(weights):
-            if rnd <= w:
-                rarity = list(rarity_pools.keys())[i]
-                break
-        items.append(random.choice(rarity_pools[rarity]))
-        if unique:
-            rarity_pools[rarity].remove(items[-1])
-            if len(rarity_pools[rarity]) == 0:
-                del rarity_pools[rarity]
-                weights = [rarity_scoring[rarity]["value"] for rarity in rarity_pools.keys()]
-                if len(weights) == 0:
-                    return items
-                weights = [sum(weights[:i])/sum(weights) for i in range(1, len(weights)+1)]
-    return items
 
+class RaritySampler:
+    """
+    Draws items of one shop pool by rarity. The allowed items of each rarity and the alias table over the
+    rarities are kept between calls and only rebuilt when the rarity values change or an item's functionals
+    give a different result (e.g. after change_rarities or enable_flag).
+    """
 
-def load_textures(sprite_config):
+    def __init__(self, pool, rarities):
+        self.pool = pool
+        self.rarities = rarities
+        # Items shown only while their functionals allow it, with the functionals resolved once.
+        self.gated = [(item, [(get_functional(functional["name"]), functional.get("params", []))
+                              for functional in item["functional"]])
+                      for item in pool if item.get("functional")]
+        self.signature = None
+        self.pools = {}
+        self.weights = {}
+        self.table = None
+
+    def refresh(self, rarity_scoring):
+        """Rebuilds the pools and the alias table if the rarity values or the allowed items changed."""
+        values = tuple(rarity_scoring[rarity]["value"] for rarity in self.rarities)
+        allowed = tuple(all(evaluate(*params) for evaluate, params in functionals) for _, functionals in self.gated)
+        if (values, allowed) == self.signature:
+            return
+        self.signature = (values, allowed)
+        hidden = {id(item) for (item, _), item_allowed in zip(self.gated, allowed) if not item_allowed}
+        self.pools = {rarity: [] for rarity in self.rarities}
+        for item in self.pool:
+            if item["rarity"] in self.pools and id(item) not in hidden:
+                self.pools[item["rarity"]].append(item)
+        self.weights = {rarity: value for rarity, value in zip(self.rarities, values)
+                        if value > 0 and self.pools[rarity]}
+        self.table = alias_table(list(self.weights.values())) if self.weights else None
+
+    def sample(self, count, rarity_scoring, unique=True, exclude_pool=None, rng=None):
+        """Draws `count` items, without replacement if `unique`, leaving out items named in `exclude_pool`."""
+        self.refresh(rarity_scoring)
+        exclude = set(exclude_pool or ())
+        pools = {}
+        for rarity in self.weights:
+            pool = self.pools[rarity]
+            if exclude:
+                pool = [item for item in pool if item["name"] not in exclude]
+            elif unique:
+                pool = pool[:]
+            pools[rarity] = pool
+        rarities = [rarity for rarity in self.weights if pools[rarity]]
+        if len(rarities) == len(self.weights):
+            table = self.table
+        else:
+            table = alias_table([self.weights[rarity] for rarity in rarities]) if rarities else None
+        items = []
+        while len(items) < count and rarities:
+            probabilities, aliases = table
+            draw = rng.random() * len(rarities)
+            index = int(draw)
+            if draw - index >= probabilities[index]:
+                index = aliases[index]
+            rarity_pool = pools[rarities[index]]
+            pick = rng.randrange(len(rarity_pool))
+            items.append(rarity_pool[pick])
+            if unique:
+                rarity_pool[pick] = rarity_pool[-1]
+                rarity_pool.pop()
+                if not rarity_pool:
+                    del rarities[index]
+                    if rarities:
+                        table = alias_table([self.weights[rarity] for rarity in rarities])
+        return items
+
+
+# Rarity samplers by shop pool and the rarities it is drawn with.
+samplers = {}
+
+
+def choose_items(count, pool, rarity_scoring, unique=True, exclude_pool=None, rng=None):
+    if rng is None:
+        rng = game_context.game.rng.shop
+    key = (id(pool), tuple(rarity_scoring))
+    sampler = samplers.get(key)
+    if sampler is None or sampler.pool is not pool:
+        sampler = samplers[key] = RaritySampler(pool, key[1])
+    return sampler.sample(count, rarity_scoring, unique, exclude_pool, rng)
+
+
+def load_textures(sprite_config, atlas_path=None):
+    # Texture files, decoded or mapped from the atlas cache
+    surfaces = texture_atlas.load(sprite_config, atlas_path)
     # Load textures
-    texture = {sprite: sprites.Sprite(sprite+'.bmp') for sprite in sprite_config["simple"]}
+    texture = {sprite: sprites.Sprite(surfaces[sprite + '.bmp']) for sprite in sprite_config["simple"]}
     # Load animated sprites
     for sprite in sprite_config["animated"]:
         f = sprite_config["animated"][sprite]["file"]
         uvs = sprite_config["animated"][sprite]["uvs"]
         wh = sprite_config["animated"][sprite]["wh"]
         ft = sprite_config["animated"][sprite].get("ft", -1)
-        texture[sprite] = sprites.AnimatedSprite(f, uvs=uvs, wh=wh, ft=ft)
+        texture[sprite] = sprites.AnimatedSprite(surfaces[f], uvs=uvs, wh=wh, ft=ft)
     # Load sprite sheets
     for sheet_name in sprite_config["spritesheets"]:
-        sheet = sprites.Sprite(sheet_name + ".bmp")
+        sheet = sprites.Sprite(surfaces[sheet_name + ".bmp"])
         for sprite in sprite_config["sheet_static"].get(sheet_name, []):
             texture[sprite] = sprites.Sprite(sheet, *sprite_config["sheet_static"][sheet_name][sprite])
         for sprite in sprite_config["sheet_animated"].get(sheet_name, []):
@@ -1,17 +1,67 @@
 from json import load
 import re
+import warnings
+from functools import lru_cache
 from math import isclose
 import pygame
 import game_context
-from config import asset_path
+from config import asset_path, fontfile, lang_fontfiles
 
 
 langs = ["en", "ru"]
-lang_file = {}
-for l in langs:
-    with open(asset_path.joinpath(f'lang/{l}.json'),
-              encoding='utf-8') as file:
-        lang_file[l] = load(file)
+fallback_lang = "en"
+# Flattened language files, {"ui.button.play": "Play", ...}, loaded on first use.
+lang_tables = {}
+
+
+def _flatten(tree, prefix=""):
+    table = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            table.update(_flatten(value, prefix + key + "."))
+        else:
+            table[prefix + key] = value
+    return table
+
+
+def lang_table(lang: str) -> dict:
+    """Returns the flattened localization table of a language, loading it on first use."""
+    table = lang_tables.get(lang)
+    if table is None:
+        with open(asset_path.joinpath(f'lang/{lang}.json'), encoding='utf-8') as file:
+            table = lang_tables[lang] = _flatten(load(file))
+    return table
+
+
+fonts = {}
+common_font_sizes = (16, 20, 24, 25, 28, 30, 36, 42)
+
+
+def get_font(size: int, lang: str = None) -> pygame.font.Font:
+    """Returns the font for the language in the given size, loading each (font file, size) pair only once.
+
+    Parameters
+    ----------
+    size - the font size.
+    lang - the language to pick the font file for, game.config.lang by default.
+
+    Returns
+    -------
+    A shared pygame font, do not change its style.
+    """
+    if lang is None:
+        lang = game_context.game.config.lang if game_context.game is not None else None
+    file = lang_fontfiles.get(lang, fontfile)
+    font = fonts.get((file, size))
+    if font is None:
+        font = fonts[(file, size)] = pygame.font.Font(file, size)
+    return font
+
+
+def preload_fonts(lang: str = None):
+    """Loads the commonly used font sizes for the language ahead of the first frame."""
+    for size in common_font_sizes:
+        get_font(size, lang)
 
 
 def format_number(number: int | float | str, places: int = 8) -> str:
@@ -55,7 +105,7 @@ def format_number(number: int | float | str, places: int = 8) -> str:
 
 
 def format_text(text: str, *args):
-    """Formats a string with the specified arguments.
+    """Formats a string with the specified arguments. Results are memoized per language.
 
     Parameters
     ----------
@@ -66,15 +116,125 @@ def format_text(text: str, *args):
     -------
     A formatted string.
     """
-    new_args = [format_number(arg) if isinstance(arg, (int, float)) else loc(arg) for arg in args]
-    text = loc(text)
+    try:
+        return _format_text(game_context.game.config.lang, text, args)
+    except TypeError:  # unhashable arguments
+        return _format_text.__wrapped__(game_context.game.config.lang, text, args)
+
+
+@lru_cache(maxsize=1024)
+def _format_text(lang, text, args):
+    new_args = [format_number(arg) if isinstance(arg, (int, float)) else loc(arg, lang) for arg in args]
+    text = loc(text, lang)
     return text.format(*new_args)
 
 
+class DescriptionTemplate:
+    """A card description split once into literal text and value slots, so formatting only fills in values.
+
+    Slots are &[flag_name] (card flag), #[effect_name.param] (effect['params'][param] or effect['param'] of the
+    first effect with that name) and either of them followed by %, which is shown as a percentage.
+    Percentage literals in the text are converted when compiling.
+    """
+    slot_pattern = re.compile(r"&\[(.*?)\]|#\[(.*?)\]")
+    percent_pattern = re.compile(r"(\d+(?:\.\d+)?)%")
+    effect_fields = ("name", "trigger", "usage", "is_negative", "duration", "params")
+
+    def __init__(self, text: str, effect_names, effect_params=None, flags=None):
+        """Compiles `text`. effect_params and flags of the card are only used to report problems."""
+        self.parts = []
+        self.problems = []
+        effect_names = list(effect_names)
+        position = 0
+        for match in self.slot_pattern.finditer(text):
+            self.parts.append(self._percentages(text[position:match.start()]))
+            position = match.end()
+            percent = text.startswith("%", position)
+            position += percent
+            if match.group(1) is not None:
+                flag = match.group(1)
+                if flags is not None and flag not in flags:
+                    self.problems.append(f"unknown flag &[{flag}]")
+                self.parts.append(("flag", flag, percent))
+                continue
+            try:
+                effect_name, param = match.group(2).split('.')
+            except ValueError:
+                self.problems.append(f"malformed slot #[{match.group(2)}]")
+                self.parts.append(("empty", None, percent))
+                continue
+            if effect_name not in effect_names:
+                self.problems.append(f"no effect {effect_name} for #[{match.group(2)}]")
+                self.parts.append(("empty", None, percent))
+                continue
+            index = effect_names.index(effect_name)
+            if param.isdigit():
+                if effect_params is not None and int(param) >= len(effect_params[index]):
+                    self.problems.append(f"effect {effect_name} has no param {param}")
+                self.parts.append(("param", (index, int(param)), percent))
+            else:
+                if param not in self.effect_fields:
+                    self.problems.append(f"effect {effect_name} has no field {param}")
+                self.parts.append(("field", (index, param), percent))
+        self.parts.append(self._percentages(text[position:]))
+
+    @classmethod
+    def _percentages(cls, literal):
+        return cls.percent_pattern.sub(lambda match: f"{float(match.group(1)):.0%}", literal)
+
+    def render(self, effects, flags) -> str:
+        """Fills in the values of one card."""
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            kind, key, percent = part
+            value = ""
+            if kind == "flag":
+                if key in flags:
+                    value = str(format_number(flags[key]))
+            elif kind == "param":
+                params = effects[key[0]].params
+                if key[1] < len(params):
+                    value = str(format_number(params[key[1]]))
+            elif kind == "field":
+                effect = effects[key[0]]
+                if hasattr(effect, key[1]):
+                    value = str(format_number(getattr(effect, key[1])))
+            out.append(self._percentages(value + "%") if percent else value)
+        return "".join(out)
+
+
+description_templates = {}
+
+
+def compile_card_descriptions(shop_items, lang=fallback_lang):
+    """Compiles the description templates of all cards in a language and warns about broken slots.
+
+    Parameters
+    ----------
+    shop_items - the item categories of cards.json.
+    lang - the language to compile, other languages are compiled on first use.
+    """
+    for items in shop_items.values():
+        for item in items:
+            if "description" not in item:
+                continue
+            effects = item.get("effects", [])
+            names = tuple(effect.get("effect") for effect in effects)
+            text = loc(item["description"], lang)
+            if (text, names) in description_templates:
+                continue
+            template = DescriptionTemplate(text, names, [effect.get("params", []) for effect in effects],
+                                           item.get("flags", {}))
+            for problem in template.problems:
+                warnings.warn(f"{item['name']} ({lang}) description: {problem}")
+            description_templates[(text, names)] = template
+
+
 def format_card_description(text: str, effects, flags):
-    """Formats a card description with the card's effects and flags.
-    &[flag_name] is replaced with flags['flag_name']
-    #[effect_name.param] is replaced with effects: effect['name'] == effect_name: effect['params'][param] or effect['param']
+    """Formats a card description with the card's effects and flags, see DescriptionTemplate.
 
     Parameters
     ----------
@@ -86,55 +246,38 @@ def format_card_description(text: str, effects, flags):
     -------
     A formatted string.
     """
-    flags_names = re.findall(r"&\[(.*?)\]", text)
-    for flag in flags_names:
-        if flag in flags:
-            text = text.replace(f"&[{flag}]", str(format_number(flags[flag])))
-        else:
-            text = text.replace(f"&[{flag}]", "")
-    params = re.findall(r"#\[(.*?)\]", text)
-    for param in params:
-        effect_name, param_name = param.split('.')
-        to_ret = ""
-        for effect in effects:
-            if effect["name"] == effect_name:
-                if param_name in effect:
-                    to_ret = str(format_number(effect[param_name]))
-                elif param_name.isdigit() and int(param_name) < len(effect["params"]):
-                    to_ret = str(format_number(effect["params"][int(param_name)]))
-                else:
-                    to_ret = ""
-                break
-        text = text.replace(f"#[{param}]", to_ret)
-    percentages = re.findall(r"(\d+(?:\.\d+)?)%", text)
-    for percentage in percentages:
-        text = text.replace(f"{percentage}%", f"{float(percentage):.0%}")
-    return text
+    key = (text, tuple(effect.name for effect in effects))
+    template = description_templates.get(key)
+    if template is None:
+        template = description_templates[key] = DescriptionTemplate(*key, [effect.params for effect in effects],
+                                                                    flags)
+        for problem in template.problems:
+            warnings.warn(f"description {text!r}: {problem}")
+    return template.render(effects, flags)
 
 
-def loc(text):
+def loc(text, lang=None):
     """Returns the localized string for the specified text.
 
     Parameters
     ----------
     text - the string to localize.
+    lang - the language, game.config.lang by default.
 
     Returns
     -------
-    A localized to game.config.lang string.
+    A localized to game.config.lang string, the fallback_lang one if it is missing there, or the text itself.
     """
-    lang = game_context.game.config.lang
+    if lang is None:
+        lang = game_context.game.config.lang
     if lang in langs:
         if isinstance(text, str):
-            dct = lang_file[lang]
-            for key in text.split('.'):
-                if key in dct:
-                    dct = dct[key]
-                else:
-                    return text
-            return dct
-        elif isinstance(text, list):
-            return loc(text[0]).format(*map(loc, text[1:]))
+            value = lang_table(lang).get(text)
+            if value is None and lang != fallback_lang:
+                value = lang_table(fallback_lang).get(text)
+            return text if value is None else value
+        elif isinstance(text, (list, tuple)):
+            return loc(text[0], lang).format(*(loc(arg, lang) for arg in text[1:]))
     else:
         raise NotImplementedError("Localization not implemented for this language.")
 
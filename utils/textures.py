@@ -1,15 +1,58 @@
+import math
+from collections import OrderedDict
 import pygame
 import game_context
 
 
+class ScaleCache:
+    """
+    Bounded LRU cache of scaled textures, keyed by (texture surface, size).
+    Animation frames are separate subsurfaces, so they get separate entries.
+    The cached surfaces are shared, set their alpha right before blitting.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, texture, new_size):
+        key = (texture, int(new_size[0]), int(new_size[1]))
+        scaled = self.surfaces.get(key)
+        if scaled is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return scaled
+        self.misses += 1
+        scaled = pygame.transform.scale(texture, key[1:])
+        self.surfaces[key] = scaled
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return scaled
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+scale_cache = ScaleCache()
+
+
 def rotoscale(texture, angle, new_size):
-    return pygame.transform.rotate(pygame.transform.scale(texture, new_size), round(angle))
+    return pygame.transform.rotate(scale_cache.get(texture, new_size), round(angle))
 
 
 def scale(texture, new_size):
     return pygame.transform.scale(texture, new_size)
 
 
+def scaled(texture, new_size):
+    """Cached scale of a texture that does not change, see ScaleCache."""
+    return scale_cache.get(texture, new_size)
+
+
 def mouse_scale(mouse_pos):
     """Scale mouse position from screen coordinates to game coordinates."""
     screen_size = pygame.display.get_window_size()
@@ -22,16 +65,38 @@ def color(hex_color):
     return [int(hex_color[1:3], 16), int(hex_color[3:5], 16), int(hex_color[5:], 16)]
 
 
-def display_screen(screen):
+def display_screen(screen, rects=None):
+    """
+    Scales the game screen to the window and shows it.
+    If `rects` (screen coordinates) are given, only those areas are copied and updated instead of the whole window.
+    """
     game = game_context.game
+    game.sound.end_frame()
     display = game.display
     screen_size = game.screen_size
     if screen_size[1] / screen_size[0] == 720 / 1280:
-        display.blit(scale(screen, screen_size), (0, 0))
+        target = pygame.Rect((0, 0), screen_size)
     elif screen_size[1] / screen_size[0] > 720 / 1280:
         diff = round(screen_size[1] - screen_size[0] * 720 / 1280)
-        display.blit(scale(screen, (screen_size[0], screen_size[1] - diff)), (0, diff // 2))
+        target = pygame.Rect((0, diff // 2), (screen_size[0], screen_size[1] - diff))
     else:
         diff = round(screen_size[0] - screen_size[1] * 1280 / 720)
-        display.blit(scale(screen, (screen_size[0] - diff, screen_size[1])), (diff // 2, 0))
-    pygame.display.flip()
\ No newline at end of file
+        target = pygame.Rect((diff // 2, 0), (screen_size[0] - diff, screen_size[1]))
+    if rects is None:
+        display.blit(scale(screen, target.size), target.topleft)
+        pygame.display.flip()
+        return
+    scale_x = target.width / screen.get_width()
+    scale_y = target.height / screen.get_height()
+    updated = []
+    for rect in rects:
+        # A pixel of margin hides seams from rounding the scaled edges.
+        rect = pygame.Rect(rect).inflate(2, 2).clip(screen.get_rect())
+        if not rect:
+            continue
+        left, top = target.x + math.floor(rect.left * scale_x), target.y + math.floor(rect.top * scale_y)
+        dest = pygame.Rect(left, top, target.x + math.ceil(rect.right * scale_x) - left,
+                           target.y + math.ceil(rect.bottom * scale_y) - top)
+        display.blit(scale(screen.subsurface(rect), dest.size), dest)
+        updated.append(dest)
+    pygame.display.update(updated)
\ No newline at end of file